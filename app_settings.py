@@ -0,0 +1,90 @@
+import json
+import os
+
+SETTINGS_PATH = "settings.json"
+
+DEFAULT_SETTINGS = {
+    "appearance": "dark",
+    "auto_refresh": True,
+    "refresh_interval": 10,
+    "enable_voice": True,
+
+    # Frame source: camera index, video file or image directory
+    "camera_source": 0,
+
+    # Face detection
+    "detection_scale": 0.5,     # detect on a frame downscaled by this factor
+    "min_face_size": 60,        # pixels in the full-resolution frame
+    "max_face_size": 0,         # 0 = no upper bound
+
+    # Recognition scheduling
+    "target_fps": 15,           # recognition frame rate to hold
+    "max_detect_interval": 10,  # at most this many frames between detections
+    "idle_after": 5.0,          # seconds without faces before slowing down
+    "idle_fps": 3,              # recognition frame rate while idle
+    "display_fps": 30,          # cap on video label refreshes
+    "recognition_workers": 0,   # multi-camera worker processes (0 = CPU count)
+
+    # Face recognition
+    "recognizer_backend": "lbph",           # "lbph" or "embedding"
+    "embedding_model": "models/face_embedding.t7",
+    "embedding_gallery": "trainer/embeddings.npz",
+    "embedding_input_size": 96,
+    "predict_threads": 0,                   # LBPH batch threads (0 = CPU count)
+    "model_check_interval": 2.0,            # seconds between trained-model checks
+    "model_settle_time": 1.0,               # model must be unchanged this long before reload
+
+    # Training
+    "training_workers": 0,              # face extraction processes (0 = CPU count)
+    "training_chunk_size": 64,          # images per extraction task
+    "evaluation_faces": 100,            # held-out faces used to score each model
+    "model_versions_kept": 10,          # older model versions are deleted (0 = keep all)
+
+    # Liveness thresholds (calibrate with liveness_benchmark)
+    "liveness_blink_threshold": 0.6,    # eye match score below this = closed
+    "liveness_movement_threshold": 15,  # head position variance, pixels^2
+    "liveness_texture_threshold": 20,   # Laplacian variance of the face
+    "liveness_motion_threshold": 0.3,   # optical flow, pixels / frame
+    "liveness_check_duration": 3,       # seconds before a verdict
+    "liveness_required_checks": 3,      # checks out of 4 that must pass
+
+    # Attendance writer
+    "attendance_batch_size": 20,        # rows per batched write
+    "attendance_flush_interval": 1.0,   # seconds before a partial batch is written
+    "attendance_fsync_interval": 5.0    # seconds between fsyncs
+}
+
+
+def load_settings(path=SETTINGS_PATH):
+    """Load settings.json merged over the defaults (missing keys get defaults)"""
+    settings = dict(DEFAULT_SETTINGS)
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                settings.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Error reading settings: {e}")
+    return settings
+
+
+def save_settings(settings, path=SETTINGS_PATH):
+    with open(path, "w") as f:
+        json.dump(settings, f, indent=4)
+
+
+def update_settings(changes, path=SETTINGS_PATH):
+    """
+    Write only `changes` into settings.json, keeping the keys already there
+
+    Defaults are not copied into the file, so later changes to
+    DEFAULT_SETTINGS still reach keys the user never set.
+    """
+    stored = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading settings: {e}")
+    stored.update(changes)
+    save_settings(stored, path)
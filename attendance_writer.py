@@ -0,0 +1,147 @@
+import csv
+import os
+import queue
+import threading
+import time
+
+
+class AttendanceWriter:
+    """
+    Buffered, batched attendance CSV writer
+
+    `write()` only puts the row on an in-memory queue, so callers on the UI
+    or recognition thread never block on file I/O. A background thread
+    collects rows until `batch_size` are pending or `flush_interval` seconds
+    have passed, appends them to their CSV files with one write per file and
+    fsyncs at most every `fsync_interval` seconds. `close()` writes everything
+    still queued and fsyncs before returning.
+    """
+
+    def __init__(self, batch_size=20, flush_interval=1.0, fsync_interval=5.0):
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.fsync_interval = float(fsync_interval)
+
+        self._queue = queue.Queue()
+        self._files = {}
+        self._needs_header = set()
+        self._last_fsync = time.monotonic()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="attendance-writer",
+                                        daemon=True)
+        self._thread.start()
+
+    def write(self, filename, fieldnames, row):
+        """Queue one row for `filename` (header written if the file is new)"""
+        if self._closed:
+            raise RuntimeError("AttendanceWriter is closed")
+        self._queue.put((filename, tuple(fieldnames), row))
+
+    def flush(self):
+        """Block until every queued row has been written and fsynced"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        """Write all pending rows, fsync and stop the background thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        running = True
+        while running:
+            batch = []
+            waiters = []
+            deadline = time.monotonic() + self.flush_interval
+
+            # Collect until the batch is full, the interval expires or we stop
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+
+            if batch:
+                self._write_batch(batch)
+
+            force_sync = bool(waiters) or not running
+            if self._files and (force_sync or
+                                time.monotonic() - self._last_fsync >= self.fsync_interval):
+                self._sync()
+
+            for waiter in waiters:
+                waiter.set()
+
+        self._close_files()
+
+    def _open(self, filename):
+        handle = self._files.get(filename)
+        if handle is None:
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            needs_header = not os.path.isfile(filename) or os.path.getsize(filename) == 0
+            handle = open(filename, 'a', newline='', encoding='utf-8', errors='replace')
+            self._files[filename] = handle
+            if needs_header:
+                self._needs_header.add(filename)
+        return handle
+
+    def _write_batch(self, batch):
+        grouped = {}
+        for filename, fieldnames, row in batch:
+            grouped.setdefault((filename, fieldnames), []).append(row)
+
+        for (filename, fieldnames), rows in grouped.items():
+            try:
+                handle = self._open(filename)
+                writer = csv.DictWriter(handle, fieldnames=fieldnames, extrasaction='ignore')
+                if filename in self._needs_header:
+                    writer.writeheader()
+                    self._needs_header.discard(filename)
+                writer.writerows(rows)
+                handle.flush()
+            except Exception as e:
+                print(f"Error saving attendance: {e}")
+
+        # Keep only today's file open; older dates will not be written again
+        if len(self._files) > 1:
+            latest = batch[-1][0]
+            for filename in [f for f in self._files if f != latest]:
+                self._close_file(filename)
+
+    def _sync(self):
+        for handle in self._files.values():
+            try:
+                handle.flush()
+                os.fsync(handle.fileno())
+            except OSError as e:
+                print(f"Error syncing attendance: {e}")
+        self._last_fsync = time.monotonic()
+
+    def _close_file(self, filename):
+        handle = self._files.pop(filename)
+        try:
+            handle.flush()
+            os.fsync(handle.fileno())
+        except OSError:
+            pass
+        handle.close()
+
+    def _close_files(self):
+        for filename in list(self._files):
+            self._close_file(filename)
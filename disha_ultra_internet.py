@@ -10,6 +10,8 @@ import re
 from queue import Queue
 from pathlib import Path
 
+from student_registry import StudentRegistry
+
 # Internet capabilities
 try:
     import requests
@@ -474,8 +476,7 @@ class DISHAUltraAI:
             try:
                 csv_path = self.project_root / "student_data" / "students.csv"
                 if csv_path.exists():
-                    with open(csv_path, 'r', encoding='utf-8') as f:
-                        count = sum(1 for _ in f) - 1  # Exclude header
+                    count = StudentRegistry.shared(str(csv_path)).count()
                     self.speak(f"You have {count} students registered in the system", "professional")
                 else:
                     self.speak("No student database found yet", "concerned")
@@ -495,10 +496,7 @@ class DISHAUltraAI:
                     
                     # Get total students
                     csv_path = self.project_root / "student_data" / "students.csv"
-                    total = 0
-                    if csv_path.exists():
-                        with open(csv_path, 'r', encoding='utf-8') as f:
-                            total = sum(1 for _ in f) - 1
+                    total = StudentRegistry.shared(str(csv_path)).count()
                     
                     percentage = (count / total * 100) if total > 0 else 0
                     
@@ -528,9 +526,7 @@ class DISHAUltraAI:
             try:
                 # Students
                 csv_path = self.project_root / "student_data" / "students.csv"
-                if csv_path.exists():
-                    with open(csv_path, 'r', encoding='utf-8') as f:
-                        students = sum(1 for _ in f) - 1
+                students = StudentRegistry.shared(str(csv_path)).count()
                 
                 # Photos
                 data_dir = self.project_root / "data"
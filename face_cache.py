@@ -0,0 +1,177 @@
+import json
+import os
+
+import numpy as np
+
+from face_processing import FACE_SIZE
+from sample_manifest import file_key
+
+CACHE_DIR = "trainer"
+
+
+class FaceCache:
+    """
+    Preprocessed training faces kept on disk between training runs
+
+    `faces.bin` holds every normalized face crop as raw (height, width)
+    uint8 rows, opened memory-mapped. `face_cache.json` records the face
+    size, the number of valid rows and, for each sample file, its rows,
+    student ID and the (mtime, size) it had when it was processed. `load()`
+    reuses the rows of unchanged samples and runs the extractor only on
+    new or changed files. Faces of new samples are appended to the end of
+    the file; it is rewritten only when a cached sample was changed or
+    removed. A retrain with nothing new is a memory-mapped load.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.faces_path = os.path.join(cache_dir, "faces.bin")
+        self.index_path = os.path.join(cache_dir, "face_cache.json")
+        self.shape = (FACE_SIZE[1], FACE_SIZE[0])
+
+    def empty(self):
+        return np.empty((0,) + self.shape, dtype=np.uint8)
+
+    def read(self):
+        """Return (faces memmap, sample index dict); empty if missing or unusable"""
+        if not (os.path.exists(self.faces_path) and os.path.exists(self.index_path)):
+            return self.empty(), {}
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            rows = int(index["rows"])
+            if tuple(index["shape"]) != self.shape:
+                # Faces were normalized to a different size
+                return self.empty(), {}
+            if rows == 0:
+                return self.empty(), index["samples"]
+            faces = np.memmap(self.faces_path, dtype=np.uint8, mode='r',
+                              shape=(rows,) + self.shape)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error reading face cache: {e}")
+            return self.empty(), {}
+        return faces, index["samples"]
+
+    def write_index(self, entries, rows):
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({"shape": list(self.shape), "rows": rows, "samples": entries}, f)
+        os.replace(temp_path, self.index_path)
+
+    def write(self, faces, entries):
+        """Replace the cache files atomically (faces first, then the index)"""
+        os.makedirs(os.path.dirname(self.faces_path) or ".", exist_ok=True)
+        temp_path = self.faces_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(np.ascontiguousarray(faces, dtype=np.uint8).tobytes())
+        os.replace(temp_path, self.faces_path)
+        self.write_index(entries, len(faces))
+
+    def append(self, faces, entries, rows):
+        """
+        Add `faces` after the first `rows` rows, then switch to the new index
+
+        Rows past `rows` (left by a run that stopped before writing its
+        index) are cut off first; until the index is replaced the old one
+        still describes the file correctly.
+        """
+        os.makedirs(os.path.dirname(self.faces_path) or ".", exist_ok=True)
+        with open(self.faces_path, 'r+b' if os.path.exists(self.faces_path) else 'wb') as f:
+            f.truncate(rows * self.shape[0] * self.shape[1])
+            f.seek(0, os.SEEK_END)
+            f.write(np.ascontiguousarray(faces, dtype=np.uint8).tobytes())
+        self.write_index(entries, rows + len(faces))
+
+    def ids(self, entries, rows):
+        ids = np.empty(rows, dtype=np.int32)
+        for entry in entries.values():
+            ids[entry["start"]:entry["start"] + entry["count"]] = entry["student_id"]
+        return ids
+
+    def load(self, samples, extract, log=None):
+        """
+        Preprocessed faces for `samples`, extracting only what is not cached
+
+        Args:
+            samples: [(path, student_id, aligned), ...] as from list_samples
+            extract: extract(samples) -> (faces, ids, counts per sample)
+            log: optional callable for progress messages
+
+        Returns:
+            tuple: (faces (N, h, w) uint8, ids int array, {filename: (start, count)})
+        """
+        cached, index = self.read()
+        keys = [file_key(path) for path, _, _ in samples]
+
+        new = []
+        changed = []
+        for sample, key in zip(samples, keys):
+            path, student_id, aligned = sample
+            entry = index.get(os.path.basename(path))
+            if entry is None:
+                new.append(sample)
+            elif (entry["file"] != key or entry["aligned"] != aligned
+                    or entry["student_id"] != student_id):
+                changed.append(sample)
+        names = {os.path.basename(path) for path, _, _ in samples}
+        removed = [name for name in index if name not in names]
+        if log is not None:
+            log(f"Face cache: {len(samples) - len(new) - len(changed)} cached, "
+                f"{len(new) + len(changed)} to process")
+
+        if not new and not changed and not removed:
+            # Nothing changed: use the cache as is
+            spans = {name: (entry["start"], entry["count"]) for name, entry in index.items()}
+            return cached, self.ids(index, len(cached)), spans
+
+        stale = new + changed
+        new_faces, counts = self.empty(), []
+        if stale:
+            new_faces, _, counts = extract(stale)
+        fresh = {}
+        start = 0
+        for (path, _, _), count in zip(stale, counts):
+            fresh[os.path.basename(path)] = new_faces[start:start + count]
+            start += count
+
+        if not changed and not removed:
+            # Only new samples: append their rows after the cached ones
+            cached_rows = rows = len(cached)
+            for (path, student_id, aligned), key in zip(samples, keys):
+                name = os.path.basename(path)
+                if name in fresh:
+                    index[name] = {"file": key, "aligned": aligned, "student_id": student_id,
+                                   "start": rows, "count": len(fresh[name])}
+                    rows += len(fresh[name])
+            # Release the old memory map before growing its file
+            del cached
+            self.append(new_faces, index, cached_rows)
+            faces, index = self.read()
+            spans = {name: (entry["start"], entry["count"]) for name, entry in index.items()}
+            return faces, self.ids(index, len(faces)), spans
+
+        # Rebuild in sample order from cached rows and fresh crops
+        blocks = []
+        ids = []
+        new_index = {}
+        spans = {}
+        row = 0
+        for (path, student_id, aligned), key in zip(samples, keys):
+            name = os.path.basename(path)
+            if name in fresh:
+                block = fresh[name]
+            else:
+                entry = index[name]
+                block = cached[entry["start"]:entry["start"] + entry["count"]]
+            blocks.append(block)
+            ids.extend([student_id] * len(block))
+            new_index[name] = {"file": key, "aligned": aligned, "student_id": student_id,
+                               "start": row, "count": len(block)}
+            spans[name] = (row, len(block))
+            row += len(block)
+
+        faces = np.concatenate(blocks) if blocks else self.empty()
+        # Release the old memory map before replacing its file
+        block = None
+        del blocks, fresh, cached
+        self.write(faces, new_index)
+        return faces, np.array(ids, dtype=np.int32), spans
@@ -0,0 +1,107 @@
+import cv2
+import numpy as np
+
+from app_settings import load_settings
+
+# Size every face crop is normalized to before training and prediction
+FACE_SIZE = (100, 100)
+
+
+def detect_faces(cascade, gray, scale=1.0, min_size=0, max_size=0,
+                 scale_factor=1.3, min_neighbors=5, small=None):
+    """
+    Run a Haar cascade on a downscaled copy of `gray`
+
+    Args:
+        cascade: cv2.CascadeClassifier
+        gray: Full-resolution grayscale frame
+        scale: Downscale factor for detection (1.0 = full resolution)
+        min_size / max_size: Face size bounds in full-resolution pixels (0 = none)
+        small: `gray` already downscaled by `scale` (e.g. FrameContext.level)
+
+    Returns:
+        list: Face boxes [(x, y, w, h), ...] in full-resolution coordinates
+    """
+    if scale <= 0 or scale >= 1:
+        scale = 1.0
+        small = gray
+    elif small is None:
+        small = cv2.resize(gray, None, fx=scale, fy=scale,
+                           interpolation=cv2.INTER_AREA)
+
+    kwargs = {}
+    if min_size:
+        side = max(1, int(min_size * scale))
+        kwargs['minSize'] = (side, side)
+    if max_size:
+        side = max(1, int(max_size * scale))
+        kwargs['maxSize'] = (side, side)
+
+    faces = cascade.detectMultiScale(small, scale_factor, min_neighbors, **kwargs)
+    if len(faces) == 0:
+        return []
+
+    boxes = np.round(np.asarray(faces, dtype=np.float32) / scale).astype(int)
+
+    # Keep boxes inside the full-resolution frame after rounding
+    height, width = gray.shape[:2]
+    boxes[:, 0] = np.clip(boxes[:, 0], 0, width - 1)
+    boxes[:, 1] = np.clip(boxes[:, 1], 0, height - 1)
+    boxes[:, 2] = np.minimum(boxes[:, 2], width - boxes[:, 0])
+    boxes[:, 3] = np.minimum(boxes[:, 3], height - boxes[:, 1])
+    return [tuple(int(v) for v in box) for box in boxes]
+
+
+def preprocess_face(roi, size=FACE_SIZE):
+    """
+    Normalize a face crop for LBPH training and prediction
+
+    The crop is converted to grayscale if needed, resized to a fixed size
+    and histogram-equalized, so train and test inputs always match and
+    predict cost no longer depends on how large the face was in the frame.
+    """
+    if roi.ndim == 3:
+        roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    if roi.shape[1] > size[0] or roi.shape[0] > size[1]:
+        interpolation = cv2.INTER_AREA
+    else:
+        interpolation = cv2.INTER_LINEAR
+    roi = cv2.resize(roi, size, interpolation=interpolation)
+    return cv2.equalizeHist(roi)
+
+
+def preprocess_faces(rois, size=FACE_SIZE):
+    """
+    Normalize several face crops into one stacked (N, height, width) uint8 array
+
+    Each crop is resized and equalized directly into its slice of the
+    output, so a frame's faces end up in one contiguous block that the
+    recognizer backends can predict on as a batch.
+    """
+    faces = np.empty((len(rois), size[1], size[0]), dtype=np.uint8)
+    for i, roi in enumerate(rois):
+        faces[i] = preprocess_face(roi, size)
+    return faces
+
+
+class FaceDetector:
+    """Haar face detector configured from settings.json"""
+
+    def __init__(self, scale=None, min_size=None, max_size=None, settings=None):
+        settings = settings or load_settings()
+        self.cascade = cv2.CascadeClassifier(
+            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        )
+        self.scale = float(settings["detection_scale"] if scale is None else scale)
+        self.min_size = int(settings["min_face_size"] if min_size is None else min_size)
+        self.max_size = int(settings["max_face_size"] if max_size is None else max_size)
+
+    def detect(self, gray, scale_factor=1.3, min_neighbors=5, small=None):
+        """Detect faces in a full-resolution grayscale frame"""
+        return detect_faces(self.cascade, gray, self.scale, self.min_size,
+                            self.max_size, scale_factor, min_neighbors, small)
+
+    def detect_context(self, ctx, scale_factor=1.3, min_neighbors=5):
+        """Detect faces using a FrameContext's cached gray image and pyramid level"""
+        return self.detect(ctx.gray, scale_factor, min_neighbors,
+                           small=ctx.level(self.scale))
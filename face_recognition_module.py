@@ -1,21 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import cv2
-from PIL import Image, ImageTk
 import numpy as np
-import os
 from datetime import datetime
-import csv
 
-# Import liveness detection (optional)
-try:
-    from liveness_detection_module import LivenessIntegration
-    LIVENESS_AVAILABLE = True
-except ImportError:
-    LIVENESS_AVAILABLE = False
+from app_settings import load_settings
+from frame_display import FrameDisplay
+from frame_sources import open_frame_source
+from recognition_engine import LIVENESS_AVAILABLE, RecognitionEngine
+from video_pipeline import VideoPipeline
 
 class FaceRecognitionModule:
-    def __init__(self, parent):
+    """Tk view over a RecognitionEngine"""
+    
+    def __init__(self, parent, camera=None):
         self.parent = parent
         self.window = tk.Toplevel(parent)
         self.window.title("Face Recognition System")
@@ -26,34 +23,18 @@ class FaceRecognitionModule:
         self.window.transient(parent)
         self.window.grab_set()
         
-        # Initialize face detection
-        self.face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
-        self.recognizer = cv2.face.LBPHFaceRecognizer_create()
+        # Detection, recognition, liveness and attendance live in the engine
+        self.engine = RecognitionEngine()
         
-        # Video capture
+        # Video capture (camera index, video file or image directory)
+        self.camera = camera if camera is not None else self.engine.settings["camera_source"]
         self.cap = None
         self.is_running = False
+        self.pipeline = None
         
-        # Recognition variables
-        self.recognized_students = set()
-        self.confidence_threshold = 50
-        
-        # Liveness detection integration
-        if LIVENESS_AVAILABLE:
-            try:
-                self.liveness = LivenessIntegration()
-                self.liveness_enabled = True
-            except:
-                self.liveness = None
-                self.liveness_enabled = False
-        else:
-            self.liveness = None
-            self.liveness_enabled = False
-        
-        # Load trained model
+        # Load trained model, then pick up retrained models automatically
         self.load_trained_model()
+        self.engine.watch_model()
         
         self.create_ui()
         
@@ -66,7 +47,7 @@ class FaceRecognitionModule:
         
         # Title
         title_text = "FACE RECOGNITION ATTENDANCE SYSTEM"
-        if LIVENESS_AVAILABLE and self.liveness_enabled:
+        if LIVENESS_AVAILABLE and self.engine.liveness_enabled:
             title_text += " (with Liveness Detection)"
         
         title_label = tk.Label(main_container, text=title_text,
@@ -95,6 +76,8 @@ class FaceRecognitionModule:
         # Video display label
         self.video_label = tk.Label(video_frame, bg='black')
         self.video_label.pack(padx=10, pady=10, fill='both', expand=True)
+        self.display = FrameDisplay(self.video_label,
+                                    max_fps=load_settings()["display_fps"])
         
         # Status labels
         status_container = tk.Frame(video_frame, bg='#16213e')
@@ -105,7 +88,7 @@ class FaceRecognitionModule:
                                     font=('Arial', 12, 'bold'))
         self.status_label.pack()
         
-        if LIVENESS_AVAILABLE and self.liveness_enabled:
+        if LIVENESS_AVAILABLE and self.engine.liveness_enabled:
             self.liveness_status_label = tk.Label(status_container, 
                                                  text="Liveness Detection: ACTIVE",
                                                  fg='#2ecc71', bg='#16213e',
@@ -195,6 +178,15 @@ class FaceRecognitionModule:
                                               fg='#2ecc71', bg='#16213e', font=('Arial', 10))
         self.recognized_count_label.pack(anchor='w', pady=2)
         
+        # Pipeline performance
+        tk.Label(control_frame, text="Pipeline",
+                font=('Arial', 12, 'bold'), fg='white', bg='#16213e').pack(pady=(20, 5))
+        
+        self.pipeline_stats_label = tk.Label(control_frame, text="Camera stopped",
+                                            fg='#00ffff', bg='#16213e',
+                                            font=('Courier', 9), justify='left')
+        self.pipeline_stats_label.pack(anchor='w', padx=10, pady=2)
+        
         # Action buttons
         tk.Label(control_frame, text="Actions",
                 font=('Arial', 12, 'bold'), fg='white', bg='#16213e').pack(pady=(20, 5))
@@ -214,7 +206,7 @@ class FaceRecognitionModule:
         recognition_frame.pack(fill='both', expand=True, pady=(20, 0))
         
         columns = ["ID", "Name", "Time", "Confidence", "Status"]
-        if LIVENESS_AVAILABLE and self.liveness_enabled:
+        if LIVENESS_AVAILABLE and self.engine.liveness_enabled:
             columns.append("Liveness")
         
         self.tree = ttk.Treeview(recognition_frame, columns=columns,
@@ -228,7 +220,7 @@ class FaceRecognitionModule:
         self.tree.column("Time", width=120)
         self.tree.column("Confidence", width=100)
         self.tree.column("Status", width=100)
-        if LIVENESS_AVAILABLE and self.liveness_enabled:
+        if LIVENESS_AVAILABLE and self.engine.liveness_enabled:
             self.tree.column("Liveness", width=100)
         
         scrollbar = ttk.Scrollbar(recognition_frame, orient="vertical",
@@ -251,27 +243,25 @@ class FaceRecognitionModule:
             self.window.after(1000, self.update_time)
     
     def update_threshold(self, value):
-        self.confidence_threshold = int(float(value))
-        self.threshold_label.config(text=f"{self.confidence_threshold}%")
+        self.engine.confidence_threshold = int(float(value))
+        self.threshold_label.config(text=f"{self.engine.confidence_threshold}%")
     
     def toggle_liveness(self):
-        if self.liveness:
-            self.liveness_enabled = self.liveness_var.get()
-            self.liveness.enable_liveness(self.liveness_enabled)
-            status = "ACTIVE" if self.liveness_enabled else "DISABLED"
-            color = "#2ecc71" if self.liveness_enabled else "#e74c3c"
+        if self.engine.liveness:
+            self.engine.set_liveness_enabled(self.liveness_var.get())
+            status = "ACTIVE" if self.engine.liveness_enabled else "DISABLED"
+            color = "#2ecc71" if self.engine.liveness_enabled else "#e74c3c"
             if hasattr(self, 'liveness_status_label'):
                 self.liveness_status_label.config(
                     text=f"Liveness Detection: {status}", fg=color
                 )
     
     def load_trained_model(self):
-        model_path = "trainer/trainer.yml"
-        if os.path.exists(model_path):
+        if self.engine.recognizer.model_exists:
             try:
-                self.recognizer.read(model_path)
-                msg = "Trained model loaded successfully!"
-                if LIVENESS_AVAILABLE and self.liveness_enabled:
+                self.engine.load_model()
+                msg = f"Trained model loaded successfully! ({self.engine.recognizer.name.upper()})"
+                if LIVENESS_AVAILABLE and self.engine.liveness_enabled:
                     msg += "\n\nLiveness Detection is ACTIVE"
                 messagebox.showinfo("Success", msg)
             except Exception as e:
@@ -281,7 +271,7 @@ class FaceRecognitionModule:
     
     def start_camera(self):
         try:
-            self.cap = cv2.VideoCapture(0)
+            self.cap = open_frame_source(self.camera)
             if not self.cap.isOpened():
                 messagebox.showerror("Error", "Could not open camera!")
                 return
@@ -291,9 +281,11 @@ class FaceRecognitionModule:
             self.stop_btn.config(state='normal')
             self.status_label.config(text="Camera Status: ACTIVE", fg='#2ecc71')
             
-            if self.liveness:
-                self.liveness.reset_detector()
+            self.engine.start_session()
             
+            self.pipeline = VideoPipeline(self.cap, self.engine.process_frame,
+                                          self.render_frame, scheduler=self.engine.scheduler)
+            self.pipeline.start()
             self.process_video()
             
         except Exception as e:
@@ -301,188 +293,82 @@ class FaceRecognitionModule:
     
     def stop_camera(self):
         self.is_running = False
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
         if self.cap is not None:
             self.cap.release()
         
         self.start_btn.config(state='normal')
         self.stop_btn.config(state='disabled')
         self.status_label.config(text="Camera Status: OFF", fg='#ff6b6b')
-        self.video_label.config(image='', bg='black')
+        self.display.clear()
+        self.pipeline_stats_label.config(text="Camera stopped")
     
     def process_video(self):
-        if not self.is_running:
+        """Poll the pipeline for the latest rendered frame (Tk thread only)"""
+        if not self.is_running or self.pipeline is None:
+            return
+        if self.pipeline.ended:
+            # A video file or image directory has no more frames
+            self.stop_camera()
+            self.status_label.config(text="Camera Status: END OF STREAM")
             return
         
-        ret, frame = self.cap.read()
-        if ret:
-            frame = self.process_face_recognition(frame)
-            
-            # Display frame
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame_rgb)
-            img = img.resize((640, 480), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(image=img)
-            
-            self.video_label.config(image=photo)
-            self.video_label.image = photo
+        img = self.pipeline.poll()
+        if img is not None:
+            self.display.show(img)
         
-        if self.is_running:
-            self.window.after(10, self.process_video)
-    
-    def process_face_recognition(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+        # Show attendance marked by the recognition stage
+        for event in self.engine.drain_events():
+            self.mark_attendance(event)
         
-        self.faces_detected_label.config(text=f"Faces: {len(faces)}")
-        recognized = len(self.recognized_students)
+        self.faces_detected_label.config(text=f"Faces: {self.engine.faces_in_frame}")
+        recognized = len(self.engine.recognized_students)
         self.recognized_count_label.config(text=f"Recognized: {recognized}")
+        self.pipeline_stats_label.config(
+            text=f"{self.pipeline.format_stats()}\n{self.engine.format_stats()}"
+        )
         
-        for (x, y, w, h) in faces:
-            roi_gray = gray[y:y+h, x:x+w]
-            
-            try:
-                id_, confidence = self.recognizer.predict(roi_gray)
-                
-                if confidence < 100 - self.confidence_threshold:
-                    name = self.get_student_name(id_)
-                    confidence_text = f"{round(100 - confidence)}%"
-                    
-                    # Liveness check
-                    liveness_passed = True
-                    liveness_status = "N/A"
-                    
-                    if self.liveness_enabled and self.liveness and id_ not in self.recognized_students:
-                        frame, liveness_passed, liveness_info = self.liveness.process_frame_with_liveness(
-                            frame, [(x, y, w, h)], self.recognizer, id_, confidence
-                        )
-                        liveness_status = liveness_info['status']
-                    
-                    # Mark attendance if liveness passed
-                    if liveness_passed and id_ not in self.recognized_students:
-                        self.mark_attendance(id_, name, confidence_text, liveness_status)
-                        self.recognized_students.add(id_)
-                    
-                    color = (0, 255, 0) if liveness_passed else (0, 0, 255)
-                    cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
-                    cv2.putText(frame, name, (x, y-10),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
-                else:
-                    cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 0, 255), 2)
-                    cv2.putText(frame, "Unknown", (x, y-10),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                
-            except Exception as e:
-                cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 0, 255), 2)
-                cv2.putText(frame, "Unknown", (x, y-10),
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-        
-        return frame
+        if self.is_running:
+            self.window.after(15, self.process_video)
     
-    def get_student_name(self, student_id):
-        """Get student name from CSV file with proper encoding"""
-        try:
-            with open('student_data/students.csv', 'r', encoding='utf-8', errors='ignore') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    try:
-                        if int(row['StudentID']) == student_id:
-                            # Clean the name - remove special characters if needed
-                            name = row['Name']
-                            # Replace problematic characters
-                            name = name.encode('ascii', 'ignore').decode('ascii')
-                            return name if name else f"Student_{student_id}"
-                    except (ValueError, KeyError):
-                        continue
-        except Exception as e:
-            print(f"Error reading student name: {e}")
-        
-        return f"Student_{student_id}"
+    def render_frame(self, ctx):
+        """Draw the frame's annotations and convert it to a display image (render stage)"""
+        return self.display.prepare(ctx.render())
     
-    def mark_attendance(self, student_id, name, confidence, liveness_status="N/A"):
-        """Mark attendance in the treeview and save to file"""
-        current_time = datetime.now().strftime("%H:%M:%S")
-        
-        values = [student_id, name, current_time, confidence, "Present"]
-        if LIVENESS_AVAILABLE and self.liveness_enabled:
-            values.append(liveness_status)
+    def mark_attendance(self, event):
+        """Show an attendance event from the engine in the treeview"""
+        values = [event['student_id'], event['name'], event['time'],
+                  event['confidence'], "Present"]
+        if LIVENESS_AVAILABLE and self.engine.liveness_enabled:
+            values.append(event['liveness_status'])
         
         self.tree.insert("", 0, values=tuple(values))
-        self.save_attendance(student_id, name, current_time, confidence, liveness_status)
-    
-    def save_attendance(self, student_id, name, time, confidence, liveness_status="N/A"):
-        """Save attendance to CSV file with proper encoding"""
-        date = datetime.now().strftime("%Y-%m-%d")
-        filename = f"attendance/attendance_{date}.csv"
-        os.makedirs("attendance", exist_ok=True)
-        
-        file_exists = os.path.isfile(filename)
-        
-        try:
-            # Clean the name - ASCII only to avoid encoding issues
-            clean_name = str(name).encode('ascii', 'ignore').decode('ascii')
-            if not clean_name:
-                clean_name = f"Student_{student_id}"
-            
-            # Open with UTF-8 encoding and error handling
-            with open(filename, 'a', newline='', encoding='utf-8', errors='replace') as file:
-                fieldnames = ['StudentID', 'Name', 'Time', 'Confidence', 'Date', 'Status']
-                if LIVENESS_AVAILABLE and self.liveness_enabled:
-                    fieldnames.append('LivenessStatus')
-                
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
-                
-                if not file_exists:
-                    writer.writeheader()
-                
-                row_data = {
-                    'StudentID': str(student_id),
-                    'Name': clean_name,
-                    'Time': time,
-                    'Confidence': confidence,
-                    'Date': date,
-                    'Status': 'Present'
-                }
-                
-                if LIVENESS_AVAILABLE and self.liveness_enabled:
-                    row_data['LivenessStatus'] = liveness_status
-                
-                writer.writerow(row_data)
-                
-        except Exception as e:
-            print(f"Error saving attendance: {e}")
-            # Try alternative method without special characters
-            try:
-                with open(filename, 'a', encoding='ascii', errors='ignore') as file:
-                    file.write(f"{student_id},{clean_name},{time},{confidence},{date},Present\n")
-            except:
-                pass
     
     def view_attendance(self):
-        msg = f"Total students marked present: {len(self.recognized_students)}"
+        msg = f"Total students marked present: {len(self.engine.recognized_students)}"
         messagebox.showinfo("Attendance", msg)
     
     def reset_session(self):
         if messagebox.askyesno("Confirm", "Reset current session?"):
-            self.recognized_students.clear()
+            self.engine.reset_session()
             self.tree.delete(*self.tree.get_children())
             
-            if self.liveness:
-                self.liveness.reset_detector()
-                self.liveness.clear_results()
-            
             messagebox.showinfo("Success", "Session reset successfully!")
     
 
     def get_real_time_stats(self):
         """Get real-time statistics for the current session"""
         return {
-            'faces_detected': len(self.recognized_students),
-            'total_recognized': len(self.recognized_students),
+            'faces_detected': len(self.engine.recognized_students),
+            'total_recognized': len(self.engine.recognized_students),
             'session_start': datetime.now().strftime("%H:%M:%S")
         }
     
     def on_closing(self):
         self.stop_camera()
+        self.engine.close()
         self.window.destroy()
 
 
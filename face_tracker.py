@@ -0,0 +1,214 @@
+import time
+
+import numpy as np
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    if union <= 0:
+        return 0.0
+    return inter / union
+
+
+def box_center(box):
+    x, y, w, h = box
+    return x + w / 2.0, y + h / 2.0
+
+
+class Track:
+    """One face followed across frames, with its cached identity"""
+
+    def __init__(self, track_id, box, now):
+        self.track_id = track_id
+        self.box = tuple(int(v) for v in box)
+        self.first_seen = now
+        self.last_seen = now
+        self.hits = 1
+        self.misses = 0
+
+        # Motion model used between detections (pixels / second)
+        self.anchor_box = self.box
+        self.anchor_time = now
+        self.velocity = (0.0, 0.0)
+
+        # Identity cache (filled by the recognizer)
+        self.student_id = None
+        self.confidence = None
+        self.identity_box = None
+        self.identity_time = None
+
+    @property
+    def has_identity(self):
+        return self.identity_time is not None
+
+
+class FaceTracker:
+    """
+    Lightweight IoU / centroid tracker for detected face boxes
+
+    Boxes from consecutive detections are matched to existing tracks by IoU
+    (falling back to centroid distance for fast moves), so each person keeps
+    a stable track ID. The recognizer result is cached per track and only
+    refreshed when the track is new, has drifted away from the box it was
+    recognized on, or the cached result is older than `identity_ttl` seconds.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_misses=5, drift_iou=0.5,
+                 identity_ttl=2.0):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.drift_iou = drift_iou
+        self.identity_ttl = identity_ttl
+
+        self.tracks = {}
+        self._next_id = 1
+
+        # Counters for the control panel
+        self.predict_calls = 0
+        self.cache_hits = 0
+
+    def reset(self):
+        """Drop all tracks and counters"""
+        self.tracks.clear()
+        self._next_id = 1
+        self.predict_calls = 0
+        self.cache_hits = 0
+
+    def clear_tracks(self):
+        """Drop all tracks but keep the counters (e.g. between unrelated images)"""
+        self.tracks.clear()
+
+    def clear_identities(self):
+        """Forget cached identities (e.g. after a model reload); tracks are kept"""
+        for track in self.tracks.values():
+            track.student_id = None
+            track.confidence = None
+            track.identity_box = None
+            track.identity_time = None
+
+    def _match(self, boxes):
+        """Greedy one-to-one matching of boxes to tracks, best pairs first"""
+        track_list = list(self.tracks.values())
+        candidates = []
+        for bi, box in enumerate(boxes):
+            bcx, bcy = box_center(box)
+            for track in track_list:
+                iou = box_iou(box, track.box)
+                if iou >= self.iou_threshold:
+                    candidates.append((1.0 + iou, bi, track.track_id))
+                    continue
+                # Centroid fallback for fast movement between detections
+                tcx, tcy = box_center(track.box)
+                dist = np.hypot(bcx - tcx, bcy - tcy)
+                limit = 0.5 * max(box[2], box[3], track.box[2], track.box[3])
+                if dist < limit:
+                    candidates.append((1.0 - dist / limit, bi, track.track_id))
+
+        candidates.sort(reverse=True)
+        matches = {}
+        used_tracks = set()
+        for _, bi, tid in candidates:
+            if bi in matches or tid in used_tracks:
+                continue
+            matches[bi] = tid
+            used_tracks.add(tid)
+        return matches
+
+    def update(self, boxes, now=None):
+        """
+        Match detections to tracks
+
+        Args:
+            boxes: Detected faces [(x, y, w, h), ...]
+            now: Timestamp (defaults to time.time())
+
+        Returns:
+            list: Track objects in the same order as `boxes`
+        """
+        now = time.time() if now is None else now
+        matches = self._match(boxes)
+
+        result = []
+        for bi, box in enumerate(boxes):
+            tid = matches.get(bi)
+            if tid is None:
+                track = Track(self._next_id, box, now)
+                self.tracks[track.track_id] = track
+                self._next_id += 1
+            else:
+                track = self.tracks[tid]
+                box = tuple(int(v) for v in box)
+                dt = now - track.anchor_time
+                if dt > 0:
+                    (ax, ay), (bx, by) = box_center(track.anchor_box), box_center(box)
+                    track.velocity = ((bx - ax) / dt, (by - ay) / dt)
+                track.box = box
+                track.anchor_box = box
+                track.anchor_time = now
+                track.last_seen = now
+                track.hits += 1
+                track.misses = 0
+            result.append(track)
+
+        seen = {track.track_id for track in result}
+        for tid in list(self.tracks):
+            if tid in seen:
+                continue
+            track = self.tracks[tid]
+            track.misses += 1
+            if track.misses > self.max_misses:
+                del self.tracks[tid]
+
+        return result
+
+    def advance(self, now=None):
+        """
+        Move tracks along their last velocity without running detection
+
+        Returns:
+            list: Tracks that were matched by the most recent detection
+        """
+        now = time.time() if now is None else now
+        result = []
+        for track in self.tracks.values():
+            if track.misses:
+                continue
+            dt = now - track.anchor_time
+            x, y, w, h = track.anchor_box
+            vx, vy = track.velocity
+            track.box = (int(round(x + vx * dt)), int(round(y + vy * dt)), w, h)
+            result.append(track)
+        return result
+
+    def needs_prediction(self, track, now=None):
+        """True if the track's cached identity must be (re)computed"""
+        now = time.time() if now is None else now
+        if not track.has_identity:
+            return True
+        if box_iou(track.box, track.identity_box) < self.drift_iou:
+            return True
+        return now - track.identity_time > self.identity_ttl
+
+    def set_identity(self, track, student_id, confidence, now=None):
+        """Cache a recognizer result on the track"""
+        track.student_id = student_id
+        track.confidence = confidence
+        track.identity_box = track.box
+        track.identity_time = time.time() if now is None else now
+        self.predict_calls += 1
+
+    def use_cached(self, track):
+        """Count a frame where the cached identity was reused"""
+        self.cache_hits += 1
+
+    def format_stats(self):
+        total = self.predict_calls + self.cache_hits
+        saved = (self.cache_hits / total * 100) if total else 0
+        return (f"Tracks: {len(self.tracks)} | predict {self.predict_calls} | "
+                f"cached {self.cache_hits} ({saved:.0f}%)")
@@ -0,0 +1,339 @@
+import os
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app_settings import load_settings
+from face_cache import FaceCache
+from face_processing import FACE_SIZE, preprocess_face
+from model_registry import ModelRegistry
+from recognizer_backends import LBPH_MODEL_PATH, EmbeddingBackend, LBPHBackend, create_backend
+from sample_manifest import SampleManifest, file_key
+
+DATA_DIR = "data"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Per-process state of a pool worker, filled once by init_worker
+_worker = {}
+
+
+def list_samples(data_dir=DATA_DIR):
+    """
+    Find the training images in `data_dir`
+
+    Returns:
+        list: [(path, student_id, aligned), ...] for files named
+        User.<id>.<n>.<ext>; `aligned` marks crops listed in the sample manifest
+    """
+    manifest = SampleManifest(data_dir)
+    samples = []
+    for filename in sorted(os.listdir(data_dir)):
+        if not filename.endswith(IMAGE_EXTENSIONS):
+            continue
+        parts = filename.split('.')
+        try:
+            student_id = int(parts[1])
+        except (IndexError, ValueError):
+            continue
+        samples.append((os.path.join(data_dir, filename), student_id,
+                        manifest.is_aligned(filename)))
+    return samples
+
+
+def init_worker():
+    """Pool initializer: one OpenCV thread and one face cascade per process"""
+    cv2.setNumThreads(1)
+    _worker['cascade'] = cv2.CascadeClassifier(
+        cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+    )
+
+
+def extract_chunk(samples):
+    """
+    Pool task: decode a chunk of images and crop every detected face
+
+    Aligned samples are already face crops and are used whole; only legacy
+    or unknown images go through detection.
+
+    Returns:
+        tuple: (faces (N, height, width) uint8, [student_id, ...] of length N,
+                [faces found in each sample, ...])
+    """
+    faces = []
+    ids = []
+    counts = []
+    for path, student_id, aligned in samples:
+        try:
+            img_np = np.array(Image.open(path).convert('L'), 'uint8')
+        except OSError as e:
+            print(f"Skipping {path}: {e}")
+            counts.append(0)
+            continue
+        if aligned:
+            boxes = [(0, 0, img_np.shape[1], img_np.shape[0])]
+        else:
+            boxes = _worker['cascade'].detectMultiScale(img_np)
+        for (x, y, w, h) in boxes:
+            faces.append(preprocess_face(img_np[y:y+h, x:x+w]))
+            ids.append(student_id)
+        counts.append(len(boxes))
+    if not faces:
+        return np.empty((0, FACE_SIZE[1], FACE_SIZE[0]), dtype=np.uint8), [], counts
+    return np.stack(faces), ids, counts
+
+
+def extract_faces(samples, workers=0, chunk_size=64, progress=None):
+    """
+    Detect and preprocess the faces of `samples` on a process pool
+
+    Images are sent to the workers in chunks of `chunk_size`, so the pool
+    spends its time decoding and detecting rather than passing messages.
+    `progress(done, total)` is called as each chunk finishes.
+
+    Returns:
+        tuple: (faces (N, height, width) uint8, ids int array of length N,
+                [faces found in each sample, ...]), in sample order
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, int(chunk_size))
+    chunks = [samples[i:i + chunk_size] for i in range(0, len(samples), chunk_size)]
+    results = [None] * len(chunks)
+    done = 0
+    with ProcessPoolExecutor(max_workers=min(workers, max(1, len(chunks))),
+                             initializer=init_worker) as pool:
+        futures = {pool.submit(extract_chunk, chunk): i for i, chunk in enumerate(chunks)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            done += len(chunks[i])
+            if progress is not None:
+                progress(done, len(samples))
+
+    ids = [id_ for _, chunk_ids, _ in results for id_ in chunk_ids]
+    counts = [count for _, _, chunk_counts in results for count in chunk_counts]
+    if not ids:
+        return (np.empty((0, FACE_SIZE[1], FACE_SIZE[0]), dtype=np.uint8),
+                np.array([], dtype=np.int32), counts)
+    return (np.concatenate([faces for faces, _, _ in results]),
+            np.array(ids, dtype=np.int32), counts)
+
+
+def split_holdout(ids, max_faces, seed=0):
+    """
+    Pick up to `max_faces` faces (at most a tenth) to evaluate a model on
+
+    Each student's first face is never picked, so everyone keeps at least
+    one training face.
+
+    Returns:
+        ndarray: Sorted row indices
+    """
+    size = min(int(max_faces), len(ids) // 10)
+    if size <= 0:
+        return np.array([], dtype=np.intp)
+    _, first = np.unique(ids, return_index=True)
+    eligible = np.setdiff1d(np.arange(len(ids)), first)
+    size = min(size, len(eligible))
+    return np.sort(np.random.default_rng(seed).choice(eligible, size, replace=False))
+
+
+def evaluate_model(backend, faces, ids):
+    """
+    Fraction of `faces` the recognizer backend labels with the right student
+
+    The faces are scored with the backend's predict_batch, the same path
+    recognition uses (LBPH thread pool or one embedding forward pass).
+    """
+    predictions = backend.predict_batch(faces)
+    correct = sum(1 for (label, _), id_ in zip(predictions, ids) if label == id_)
+    return correct / len(ids)
+
+
+class TrainingJob(threading.Thread):
+    """
+    Model training on a background thread
+
+    Preprocessed faces come from the FaceCache; only new or changed
+    samples are decoded, on a process pool (see extract_faces). The LBPH
+    model is trained on this thread and published as a new version in the
+    ModelRegistry. With `incremental`, the live version is loaded and only
+    samples added since it was trained (per its metadata) are passed to
+    `update()`. That falls back to a full retrain when there is no model
+    yet, when a trained sample was changed or removed (LBPH cannot forget
+    samples), or when the embedding backend needs every face for its
+    gallery.
+
+    Everything the UI needs is posted to `events` as tuples, for the Tk
+    loop to poll:
+
+        ('log', message)
+        ('progress', done, total)
+        ('faces', count)
+        ('done', {'faces': count, 'model_path': path, 'version': n,
+                  'incremental': bool, 'seconds': elapsed})
+        ('error', message)
+    """
+
+    def __init__(self, data_dir=DATA_DIR, settings=None, incremental=False):
+        super().__init__(name="training", daemon=True)
+        self.data_dir = data_dir
+        self.settings = settings or load_settings()
+        self.incremental = incremental
+        self.events = queue.Queue()
+
+    def post(self, *event):
+        self.events.put(event)
+
+    def run(self):
+        try:
+            self.post('done', self.train())
+        except Exception as e:
+            self.post('error', str(e))
+
+    def full_retrain_reason(self, previous, keys, backend):
+        """Why an incremental update is not possible, or None"""
+        if not previous:
+            return "no previous model version"
+        if isinstance(backend, EmbeddingBackend):
+            return "the embedding gallery is built from every face"
+        for filename, key in previous["samples"].items():
+            if keys.get(filename) != key:
+                return f"{filename} was changed or removed"
+        return None
+
+    def extract(self, samples):
+        """Run extract_faces on the samples the face cache is missing"""
+        workers = self.settings["training_workers"] or os.cpu_count() or 1
+        aligned = sum(1 for sample in samples if sample[2])
+        self.post('log', f"Processing {len(samples)} images on {workers} process(es) "
+                         f"({aligned} pre-aligned, {len(samples) - aligned} to detect)...")
+        return extract_faces(
+            samples, workers, self.settings["training_chunk_size"],
+            progress=lambda done, total: self.post('progress', done, total)
+        )
+
+    def train(self):
+        started = time.perf_counter()
+        samples = list_samples(self.data_dir)
+        keys = {os.path.basename(path): file_key(path) for path, _, _ in samples}
+        registry = ModelRegistry(settings=self.settings)
+        current = registry.current_version()
+        previous = registry.metadata(current)
+        backend = create_backend(self.settings)
+
+        incremental = self.incremental
+        if incremental:
+            reason = self.full_retrain_reason(previous, keys, backend)
+            if reason:
+                self.post('log', f"Full retrain needed: {reason}")
+                incremental = False
+        new = samples
+        if incremental:
+            new = [s for s in samples if os.path.basename(s[0]) not in previous["samples"]]
+            if not new:
+                self.post('log', f"Model version {current} is up to date")
+                return {'faces': 0, 'model_path': LBPH_MODEL_PATH, 'version': current,
+                        'incremental': True, 'seconds': time.perf_counter() - started}
+
+        # Every sample goes through the cache so it stays complete for full retrains
+        faces, ids, spans = FaceCache().load(samples, self.extract,
+                                             log=lambda message: self.post('log', message))
+        self.post('progress', len(samples), len(samples))
+        if incremental:
+            rows = [np.arange(start, start + count, dtype=np.intp)
+                    for start, count in (spans[os.path.basename(path)] for path, _, _ in new)]
+            rows = np.concatenate(rows)
+            faces, ids = faces[rows], ids[rows]
+
+        self.post('faces', len(faces))
+        self.post('log', f"Detected {len(faces)} faces from {len(new)} "
+                         f"{'new ' if incremental else ''}images")
+        if len(faces) == 0:
+            raise Exception("No faces detected in the images!")
+
+        version = registry.new_version()
+        try:
+            metadata = self.train_version(registry, version, current, previous,
+                                          faces, ids, incremental, backend)
+        except Exception:
+            shutil.rmtree(registry.version_dir(version), ignore_errors=True)
+            raise
+
+        trained = {os.path.basename(path): keys[os.path.basename(path)] for path, _, _ in new}
+        if incremental:
+            trained = dict(previous["samples"], **trained)
+        metadata.update(samples=trained, sample_count=len(trained),
+                        training_seconds=round(time.perf_counter() - started, 2))
+        registry.publish(version, metadata)
+        self.post('log', f"Model version {version} is live ({LBPH_MODEL_PATH})")
+
+        return {'faces': len(faces), 'model_path': LBPH_MODEL_PATH, 'version': version,
+                'incremental': incremental, 'seconds': time.perf_counter() - started}
+
+    def train_version(self, registry, version, current, previous, faces, ids,
+                      incremental, backend):
+        """Train and write the files of a new model version; returns its metadata"""
+        # Train without a holdout, score it, then add the holdout: LBPH
+        # update() only appends histograms, so the result matches training
+        # on every face at once. The embedding gallery is scored the same
+        # way, then rebuilt from every face.
+        holdout = split_holdout(ids, self.settings["evaluation_faces"])
+        train_rows = np.setdiff1d(np.arange(len(ids)), holdout)
+
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        if incremental:
+            self.post('log', f"Updating model version {current}...")
+            recognizer.read(registry.model_path(current))
+            recognizer.update(list(faces[train_rows]), ids[train_rows])
+        else:
+            self.post('log', "Training LBPH Face Recognizer...")
+            recognizer.train(list(faces[train_rows]), ids[train_rows])
+
+        embedding = isinstance(backend, EmbeddingBackend)
+        if embedding:
+            backend.gallery_path = registry.gallery_path(version)
+
+        accuracy = None
+        if len(holdout):
+            if embedding:
+                backend.build_gallery(list(faces[train_rows]), ids[train_rows].tolist())
+                scorer = backend
+            else:
+                scorer = LBPHBackend(threads=self.settings["predict_threads"])
+                scorer.recognizer = recognizer
+            try:
+                accuracy = evaluate_model(scorer, faces[holdout], ids[holdout])
+            finally:
+                scorer.close()
+            self.post('log', f"Accuracy on {len(holdout)} held-out faces "
+                             f"({backend.name}): {accuracy * 100:.1f}%")
+            recognizer.update(list(faces[holdout]), ids[holdout])
+
+        recognizer.write(registry.model_path(version))
+
+        # Build the embedding gallery when that backend is selected
+        if embedding:
+            self.post('log', "Building embedding gallery...")
+            students = backend.build_gallery(list(faces), ids.tolist())
+            self.post('log', f"Gallery built ({students} students)")
+
+        labels, counts = np.unique(ids, return_counts=True)
+        students = dict(previous.get("students", {})) if incremental else {}
+        for label, count in zip(labels.tolist(), counts.tolist()):
+            students[str(label)] = students.get(str(label), 0) + count
+        return {
+            "mode": "incremental" if incremental else "full",
+            "parent": current if incremental else None,
+            "backend": backend.name,
+            "face_count": sum(students.values()),
+            "new_faces": len(faces),
+            "students": students,
+            "eval_accuracy": accuracy,
+            "eval_faces": len(holdout)
+        }
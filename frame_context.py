@@ -0,0 +1,65 @@
+import time
+
+import cv2
+
+
+class FrameContext:
+    """
+    Everything the recognition stages share about one video frame
+
+    The grayscale image and any downscaled levels are computed once, on
+    first use, and reused by detection, recognition and liveness. Stages
+    queue their annotations with `add_box` / `add_overlay`; `render()`
+    draws them all in place on the BGR frame, once, on the render stage.
+    """
+
+    def __init__(self, frame, timestamp=None):
+        self.frame = frame
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self._gray = None
+        self._levels = {}
+        self._overlays = []
+        self._rendered = False
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def shape(self):
+        return self.frame.shape
+
+    def level(self, scale):
+        """Grayscale frame downscaled by `scale` (cached; 1.0 or invalid = full size)"""
+        if scale <= 0 or scale >= 1:
+            return self.gray
+        small = self._levels.get(scale)
+        if small is None:
+            small = cv2.resize(self.gray, None, fx=scale, fy=scale,
+                               interpolation=cv2.INTER_AREA)
+            self._levels[scale] = small
+        return small
+
+    def add_box(self, box, label, color):
+        """Queue a labelled face rectangle"""
+        self._overlays.append((draw_box, (box, label, color)))
+
+    def add_overlay(self, func, *args):
+        """Queue `func(frame, *args)` to draw at render time"""
+        self._overlays.append((func, args))
+
+    def render(self):
+        """Draw every queued overlay onto the frame in place and return it"""
+        if not self._rendered:
+            for func, args in self._overlays:
+                func(self.frame, *args)
+            self._rendered = True
+        return self.frame
+
+
+def draw_box(frame, box, label, color):
+    x, y, w, h = box
+    cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
+    cv2.putText(frame, label, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
@@ -0,0 +1,50 @@
+import time
+
+import cv2
+from PIL import Image, ImageTk
+
+
+class FrameDisplay:
+    """
+    Fast BGR frame -> Tk label display path
+
+    `prepare()` shrinks the frame with cv2.resize(INTER_AREA) before the
+    colour conversion, so only display-sized pixels are converted and handed
+    to PIL. It is safe to call from a worker thread. `show()` must run on the
+    Tk thread: it reuses a single PhotoImage via paste() instead of allocating
+    one per frame and skips frames above `max_fps`.
+    """
+
+    def __init__(self, label, size=(640, 480), max_fps=30):
+        self.label = label
+        self.size = tuple(size)
+        self.max_fps = float(max_fps)
+        self.photo = None
+        self._last_shown = 0.0
+
+    def prepare(self, frame):
+        """Resize and convert a BGR frame into a display-sized PIL image"""
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def show(self, img):
+        """Display a prepared image; returns False if skipped by the FPS cap"""
+        now = time.monotonic()
+        if self.max_fps > 0 and now - self._last_shown < 1.0 / self.max_fps:
+            return False
+        self._last_shown = now
+
+        if self.photo is None or (self.photo.width(), self.photo.height()) != img.size:
+            self.photo = ImageTk.PhotoImage(image=img)
+            self.label.config(image=self.photo)
+            self.label.image = self.photo
+        else:
+            self.photo.paste(img)
+        return True
+
+    def clear(self):
+        """Blank the label; the next frame allocates a fresh PhotoImage"""
+        self.photo = None
+        self.label.config(image='', bg='black')
+        self.label.image = None
@@ -0,0 +1,151 @@
+import os
+import time
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class FramePacer:
+    """Sleeps so successive frames are spaced 1 / fps apart"""
+
+    def __init__(self, fps):
+        self.fps = fps
+        self._next_time = None
+
+    def wait(self):
+        now = time.perf_counter()
+        if self._next_time is None:
+            self._next_time = now
+        delay = self._next_time - now
+        if delay > 0:
+            time.sleep(delay)
+        self._next_time = max(self._next_time, now) + 1.0 / self.fps
+
+
+class CameraSource:
+    """Live camera (cv2.VideoCapture on an index or stream URL)"""
+
+    def __init__(self, index):
+        self.name = f"camera:{index}"
+        self.cap = cv2.VideoCapture(index)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource:
+    """
+    Recorded video replayed either at its native frame rate or as fast as possible
+
+    In real-time mode `read()` sleeps so frames come out at the file's FPS,
+    like a camera would deliver them. With `realtime=False` frames are
+    returned back-to-back, which is what benchmarks want. `loop` restarts
+    the file at the end instead of reporting end-of-stream (`ended`).
+    """
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.name = path
+        self.realtime = realtime
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.pacer = FramePacer(self.fps) if realtime else None
+        self.frame_index = -1
+        self.ended = False
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        if self.pacer:
+            self.pacer.wait()
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+            self.frame_index = -1
+        if ret:
+            self.frame_index += 1
+        else:
+            self.ended = True
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectorySource:
+    """
+    Directory of still images replayed in file-name order as video frames
+
+    Without `loop`, `ended` is set once the last image has been read; an
+    image that fails to decode is skipped.
+    """
+
+    def __init__(self, path, realtime=True, loop=False, fps=30.0):
+        self.name = path
+        self.realtime = realtime
+        self.loop = loop
+        self.fps = float(fps)
+        self.pacer = FramePacer(self.fps) if realtime else None
+        self.files = sorted(
+            os.path.join(path, f) for f in os.listdir(path)
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.frame_index = -1
+        self.ended = False
+
+    def isOpened(self):
+        return len(self.files) > 0
+
+    @property
+    def current_file(self):
+        if 0 <= self.frame_index < len(self.files):
+            return self.files[self.frame_index]
+        return None
+
+    def read(self):
+        if self.pacer:
+            self.pacer.wait()
+        if self.frame_index + 1 >= len(self.files):
+            if not self.loop or not self.files:
+                self.ended = True
+                return False, None
+            self.frame_index = -1
+        self.frame_index += 1
+        frame = cv2.imread(self.files[self.frame_index])
+        return frame is not None, frame
+
+    def release(self):
+        pass
+
+
+def open_frame_source(source, realtime=True, loop=False):
+    """
+    Open a frame source from a camera index, video file or image directory
+
+    Args:
+        source: int / digit string (camera index), stream URL, video file
+            path, or directory of images
+        realtime: Replay files at their native rate (False = as fast as possible)
+        loop: Restart files at the end
+
+    Returns:
+        An object with cv2.VideoCapture-like isOpened() / read() / release()
+    """
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return CameraSource(int(source))
+    if os.path.isdir(source):
+        return ImageDirectorySource(source, realtime=realtime, loop=loop)
+    if os.path.isfile(source):
+        return VideoFileSource(source, realtime=realtime, loop=loop)
+    # Anything else (rtsp://, http://, ...) goes straight to OpenCV
+    return CameraSource(source)
@@ -0,0 +1,206 @@
+import argparse
+import csv
+import json
+
+import cv2
+import numpy as np
+
+from app_settings import load_settings, update_settings
+from face_processing import FaceDetector
+from frame_sources import open_frame_source
+from liveness_detection_module import LIVENESS_SETTINGS, LivenessDetector
+from recognition_benchmark import percentiles
+
+CHECKS = ['blink', 'movement', 'texture', 'motion']
+
+# Candidate values tried for each threshold when sweeping
+SWEEP_GRID = {
+    "liveness_blink_threshold": [0.4, 0.5, 0.6, 0.7, 0.8],
+    "liveness_movement_threshold": [5, 10, 15, 25, 40],
+    "liveness_texture_threshold": [10, 20, 40, 80, 160],
+    "liveness_motion_threshold": [0.1, 0.2, 0.3, 0.5, 0.8]
+}
+
+
+def load_manifest(path):
+    """Read `path,label` rows (label is live or spoof)"""
+    clips = []
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            label = row['label'].strip().lower()
+            if label not in ('live', 'spoof'):
+                raise ValueError(f"Unknown label {label!r} for {row['path']}")
+            clips.append((row['path'], label == 'live'))
+    return clips
+
+
+def scan_clip(path, detector, max_seconds):
+    """
+    Find the largest face in every frame of a clip once
+
+    Returns:
+        tuple: (fps, [(x, y, w, h) or None per frame])
+    """
+    source = open_frame_source(path, realtime=False)
+    if not source.isOpened():
+        raise SystemExit(f"Could not open clip {path}")
+    fps = getattr(source, 'fps', 30.0)
+    boxes = []
+    try:
+        while len(boxes) < max_seconds * fps:
+            ret, frame = source.read()
+            if not ret:
+                break
+            faces = detector.detect(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+            boxes.append(max(faces, key=lambda b: b[2] * b[3]) if faces else None)
+    finally:
+        source.release()
+    return fps, boxes
+
+
+def replay_clip(path, fps, boxes, settings):
+    """
+    Run one LivenessDetector over a clip on the clip's own clock
+
+    Returns:
+        dict: accepted (bool), time_to_verdict (seconds or None), check timings
+    """
+    detector = LivenessDetector(settings)
+    source = open_frame_source(path, realtime=False)
+    timings = {check: [] for check in CHECKS}
+    verdict_time = None
+    try:
+        for index, box in enumerate(boxes):
+            ret, frame = source.read()
+            if not ret:
+                break
+            if box is None:
+                continue
+            now = index / fps
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            is_live, _, _ = detector.check_liveness(frame, box, gray, now=now)
+            for check, seconds in detector.check_times.items():
+                timings[check].append(seconds)
+            if is_live:
+                verdict_time = now - detector.start_time
+                break
+    finally:
+        source.release()
+    return {'accepted': verdict_time is not None, 'time_to_verdict': verdict_time,
+            'timings': timings}
+
+
+def evaluate(clips, scans, settings):
+    """Replay every clip with `settings` and compute FAR / FRR and latency"""
+    live = spoof = false_rejects = false_accepts = 0
+    verdict_times = []
+    timings = {check: [] for check in CHECKS}
+    for path, is_live in clips:
+        fps, boxes = scans[path]
+        result = replay_clip(path, fps, boxes, settings)
+        for check in CHECKS:
+            timings[check].extend(result['timings'][check])
+        if is_live:
+            live += 1
+            if result['accepted']:
+                verdict_times.append(result['time_to_verdict'])
+            else:
+                false_rejects += 1
+        else:
+            spoof += 1
+            if result['accepted']:
+                false_accepts += 1
+    return {
+        'far': false_accepts / spoof if spoof else 0.0,
+        'frr': false_rejects / live if live else 0.0,
+        'time_to_verdict': float(np.mean(verdict_times)) if verdict_times else None,
+        'checks': {check: percentiles(values) for check, values in timings.items() if values}
+    }
+
+
+def cost(result, far_weight):
+    """Lower is better: weighted error rate, ties broken by time to verdict"""
+    ttv = result['time_to_verdict']
+    return (far_weight * result['far'] + result['frr'], ttv if ttv is not None else float('inf'))
+
+
+def sweep(clips, scans, settings, far_weight):
+    """Coordinate-descent over SWEEP_GRID, one threshold at a time"""
+    best = dict(settings)
+    best_result = evaluate(clips, scans, best)
+    for key, values in SWEEP_GRID.items():
+        for value in values:
+            if value == best[key]:
+                continue
+            candidate = dict(best, **{key: value})
+            result = evaluate(clips, scans, candidate)
+            print(f"  {key}={value}: FAR {result['far'] * 100:.1f}% FRR {result['frr'] * 100:.1f}%")
+            if cost(result, far_weight) < cost(best_result, far_weight):
+                best, best_result = candidate, result
+    return best, best_result
+
+
+def format_result(title, result):
+    ttv = result['time_to_verdict']
+    lines = [f"{title}: FAR {result['far'] * 100:.1f}% | FRR {result['frr'] * 100:.1f}% | "
+             f"time to verdict {f'{ttv:.2f}s' if ttv is not None else 'n/a'}",
+             f"  {'check':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+    for check in CHECKS:
+        s = result['checks'].get(check)
+        if s:
+            lines.append(f"  {check:<10}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay labelled live / spoof clips through LivenessDetector and calibrate it")
+    parser.add_argument("--live", nargs="+", default=[], help="clips of real people")
+    parser.add_argument("--spoof", nargs="+", default=[], help="clips of photos / screens / masks")
+    parser.add_argument("--manifest", help="CSV with path,label (live / spoof) rows")
+    parser.add_argument("--max-seconds", type=float, default=10.0,
+                        help="seconds of each clip to replay")
+    parser.add_argument("--sweep", action="store_true", help="search for better thresholds")
+    parser.add_argument("--far-weight", type=float, default=2.0,
+                        help="cost of a false accept relative to a false reject when sweeping")
+    parser.add_argument("--write", action="store_true",
+                        help="save the best thresholds to settings.json")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    if args.write and not args.sweep:
+        parser.error("--write needs --sweep (there are no new thresholds to save)")
+
+    clips = [(p, True) for p in args.live] + [(p, False) for p in args.spoof]
+    if args.manifest:
+        clips += load_manifest(args.manifest)
+    if not clips:
+        parser.error("no clips given (use --live / --spoof or --manifest)")
+
+    settings = load_settings()
+    face_detector = FaceDetector(settings=settings)
+    scans = {path: scan_clip(path, face_detector, args.max_seconds) for path, _ in clips}
+
+    baseline = evaluate(clips, scans, settings)
+    print(format_result("Current thresholds", baseline))
+    report = {'baseline': baseline,
+              'thresholds': {key: settings[key] for key in LIVENESS_SETTINGS.values()}}
+
+    if args.sweep:
+        print("Sweeping thresholds...")
+        best, best_result = sweep(clips, scans, settings, args.far_weight)
+        changed = {key: best[key] for key in SWEEP_GRID if best[key] != settings[key]}
+        print(format_result("Best thresholds", best_result))
+        print(f"  changes: {changed or 'none'}")
+        report['best'] = best_result
+        report['best_thresholds'] = {key: best[key] for key in LIVENESS_SETTINGS.values()}
+        if args.write and changed:
+            update_settings(changed)
+            print("Saved to settings.json")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
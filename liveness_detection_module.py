@@ -1,8 +1,37 @@
 import cv2
 import numpy as np
 from collections import deque
+import queue
+import threading
 import time
 
+from app_settings import load_settings
+from frame_context import FrameContext
+from video_pipeline import DropOldestQueue, StageStats
+
+_eye_cascade = None
+
+# LivenessDetector attribute -> settings.json key it is read from
+LIVENESS_SETTINGS = {
+    'blink_match_threshold': 'liveness_blink_threshold',
+    'movement_threshold': 'liveness_movement_threshold',
+    'texture_threshold': 'liveness_texture_threshold',
+    'motion_threshold': 'liveness_motion_threshold',
+    'check_duration': 'liveness_check_duration',
+    'required_checks': 'liveness_required_checks'
+}
+
+
+def get_eye_cascade():
+    """Eye cascade shared by every per-track LivenessDetector"""
+    global _eye_cascade
+    if _eye_cascade is None:
+        _eye_cascade = cv2.CascadeClassifier(
+            cv2.data.haarcascades + 'haarcascade_eye.xml'
+        )
+    return _eye_cascade
+
+
 class LivenessDetector:
     """
     Liveness Detection Module for Face Recognition System
@@ -13,22 +42,32 @@ class LivenessDetector:
     2. Head movement detection
     3. Texture analysis (detects flat surfaces like photos)
     4. Motion analysis (detects natural micro-movements)
+    
+    One detector holds the state of one face; LivenessIntegration keeps one
+    per tracked face. Thresholds come from settings.json (see
+    LIVENESS_SETTINGS) and can be calibrated with liveness_benchmark.
     """
     
-    def __init__(self):
-        # Load cascade classifiers
-        self.face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
-        self.eye_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_eye.xml'
-        )
+    def __init__(self, settings=None):
+        # Eye cascade is shared (faces come from the caller's FaceDetector)
+        self.eye_cascade = get_eye_cascade()
         
         # Blink detection parameters
         self.blink_counter = 0
         self.total_blinks = 0
-        self.eye_aspect_ratio_threshold = 0.25
         self.consecutive_frames = 2
+        self.max_blink_duration = 0.4       # seconds; longer dips are not blinks
+        self.blink_started = None
+        
+        # Eye tracking on a normalized upper-face band
+        self.eye_band_width = 96            # pixels the band is resized to
+        self.eye_band_height = 0.55         # fraction of the face height
+        self.blink_match_threshold = 0.6    # match score below this = eyes closed
+        self.eye_lost_threshold = 0.2       # match score below this = not an eye
+        self.max_eye_lost_frames = 10       # frames before the cascade runs again
+        self.eye_templates = None
+        self.eye_boxes = None
+        self.eye_lost_frames = 0
         
         # Head movement detection
         self.face_positions = deque(maxlen=10)
@@ -38,10 +77,17 @@ class LivenessDetector:
         self.texture_scores = deque(maxlen=5)
         self.texture_threshold = 20
         
-        # Motion analysis
+        # Motion analysis (sparse optical flow in the face box)
         self.prev_gray = None
         self.motion_scores = deque(maxlen=10)
-        self.motion_threshold = 5
+        self.motion_threshold = 0.3     # mean point displacement, pixels / frame
+        self.flow_margin = 0.2          # face box expansion on each side
+        self.max_flow_points = 20
+        self.min_flow_points = 6
+        self.flow_points = None
+        
+        # Seconds spent in each check on the last call
+        self.check_times = {}
         
         # Overall liveness tracking
         self.liveness_checks = {
@@ -51,9 +97,14 @@ class LivenessDetector:
             'motion': False
         }
         
-        # Time tracking
-        self.start_time = time.time()
+        # Time tracking (starts with the first check)
+        self.start_time = None
         self.check_duration = 3  # seconds to complete liveness check
+        self.required_checks = 3  # checks out of 4 that must pass
+        
+        settings = settings or load_settings()
+        for attribute, key in LIVENESS_SETTINGS.items():
+            setattr(self, attribute, settings[key])
         
     def reset(self):
         """Reset all detection parameters"""
@@ -63,57 +114,128 @@ class LivenessDetector:
         self.texture_scores.clear()
         self.motion_scores.clear()
         self.prev_gray = None
+        self.flow_points = None
+        self.eye_templates = None
+        self.eye_boxes = None
+        self.eye_lost_frames = 0
+        self.blink_started = None
+        self.check_times = {}
         self.liveness_checks = {
             'blink': False,
             'movement': False,
             'texture': False,
             'motion': False
         }
-        self.start_time = time.time()
-    
-    def eye_aspect_ratio(self, eye_points):
-        """Calculate eye aspect ratio for blink detection"""
-        # Simplified EAR calculation
-        height = abs(eye_points[1] - eye_points[3])
-        width = abs(eye_points[0] - eye_points[2])
-        
-        if width == 0:
-            return 0
-        
-        ear = height / width
-        return ear
+        self.start_time = None
     
-    def detect_blink(self, gray, face):
-        """Detect eye blinking"""
+    def eye_band(self, gray, face):
+        """Upper part of the face, resized to a fixed small width"""
         x, y, w, h = face
-        roi_gray = gray[y:y+h, x:x+w]
-        
-        # Detect eyes in face region
+        band = gray[y:y + int(h * self.eye_band_height), x:x + w]
+        if band.size == 0:
+            return None
+        width = self.eye_band_width
+        height = max(1, int(round(band.shape[0] * width / band.shape[1])))
+        interpolation = cv2.INTER_AREA if band.shape[1] > width else cv2.INTER_LINEAR
+        return cv2.resize(band, (width, height), interpolation=interpolation)
+    
+    def find_eyes(self, band):
+        """Run the eye cascade on the band; keep the two largest eyes as templates"""
         eyes = self.eye_cascade.detectMultiScale(
-            roi_gray,
+            band,
             scaleFactor=1.1,
             minNeighbors=5,
-            minSize=(20, 20)
+            minSize=(12, 12)
         )
+        if len(eyes) < 2:
+            return False
+        eyes = sorted(eyes, key=lambda e: e[2] * e[3], reverse=True)[:2]
+        self.eye_boxes = [tuple(int(v) for v in e) for e in eyes]
+        self.eye_templates = [band[ey:ey+eh, ex:ex+ew].copy() for ex, ey, ew, eh in self.eye_boxes]
+        self.eye_lost_frames = 0
+        return True
+    
+    def track_eyes(self, band):
+        """
+        Follow the eye templates with template matching near their last position
         
-        if len(eyes) >= 2:
-            # Calculate average eye openness
-            total_ear = 0
-            for (ex, ey, ew, eh) in eyes[:2]:
-                eye_points = [ex, ey, ex + ew, ey + eh]
-                ear = self.eye_aspect_ratio(eye_points)
-                total_ear += ear
-            
-            avg_ear = total_ear / 2
-            
-            # Check if eyes are closed
-            if avg_ear < self.eye_aspect_ratio_threshold:
-                self.blink_counter += 1
-            else:
-                if self.blink_counter >= self.consecutive_frames:
-                    self.total_blinks += 1
-                    self.liveness_checks['blink'] = True
+        Returns:
+            tuple: (mean match score, 1.0 = identical to the open-eye template;
+                    True if every best match moved less than a quarter of
+                    the eye size since the last frame)
+        """
+        scores = []
+        steady = True
+        for i, ((ex, ey, ew, eh), template) in enumerate(zip(self.eye_boxes, self.eye_templates)):
+            mx, my = ew // 2, eh // 2
+            x0, y0 = max(ex - mx, 0), max(ey - my, 0)
+            x1, y1 = min(ex + ew + mx, band.shape[1]), min(ey + eh + my, band.shape[0])
+            window = band[y0:y1, x0:x1]
+            if window.shape[0] < eh or window.shape[1] < ew:
+                scores.append(0.0)
+                steady = False
+                continue
+            result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, loc = cv2.minMaxLoc(result)
+            scores.append(score)
+            nx, ny = x0 + loc[0], y0 + loc[1]
+            if abs(nx - ex) > ew // 4 or abs(ny - ey) > eh // 4:
+                steady = False
+            if score >= self.eye_lost_threshold:
+                self.eye_boxes[i] = (nx, ny, ew, eh)
+        return float(np.mean(scores)), steady
+    
+    def detect_blink(self, gray, face, now=None):
+        """
+        Detect eye blinking
+        
+        Eyes are searched only in the upper face band at a fixed small
+        resolution. Once found they are followed by template matching, and
+        the cascade runs again only when tracking is lost. A blink is a
+        short dip (at least `consecutive_frames`, at most
+        `max_blink_duration` seconds) of the match score against the
+        open-eye templates, with the eyes staying in place. Lost tracking
+        or a moving match (e.g. a photo being waved) cancels the dip.
+        """
+        now = time.time() if now is None else now
+        band = self.eye_band(gray, face)
+        if band is None:
+            return self.total_blinks
+        
+        if self.eye_templates is None:
+            self.find_eyes(band)
+            return self.total_blinks
+        
+        score, steady = self.track_eyes(band)
+        if score < self.eye_lost_threshold:
+            # Not an eye at all: this is lost tracking, not a closed eye
+            self.blink_counter = 0
+            self.blink_started = None
+            self.eye_lost_frames += 1
+            if self.eye_lost_frames > self.max_eye_lost_frames:
+                # Search with the cascade again next frame
+                self.eye_templates = None
+                self.eye_boxes = None
+            return self.total_blinks
+        self.eye_lost_frames = 0
+        
+        # Check if eyes are closed
+        if score < self.blink_match_threshold:
+            if not steady:
+                # The match moved: the face moved, the eyes did not close
                 self.blink_counter = 0
+                self.blink_started = None
+            else:
+                if self.blink_counter == 0:
+                    self.blink_started = now
+                self.blink_counter += 1
+        else:
+            if (self.blink_counter >= self.consecutive_frames
+                    and now - self.blink_started <= self.max_blink_duration):
+                self.total_blinks += 1
+                self.liveness_checks['blink'] = True
+            self.blink_counter = 0
+            self.blink_started = None
         
         return self.total_blinks
     
@@ -162,44 +284,114 @@ class LivenessDetector:
         
         return False
     
-    def analyze_motion(self, gray):
-        """Analyze micro-movements and optical flow"""
-        if self.prev_gray is not None:
-            # Calculate frame difference
-            diff = cv2.absdiff(self.prev_gray, gray)
-            motion_score = np.mean(diff)
-            
-            self.motion_scores.append(motion_score)
-            
-            if len(self.motion_scores) >= 5:
-                avg_motion = np.mean(self.motion_scores)
-                # Real people have continuous micro-movements
-                if avg_motion > self.motion_threshold:
-                    self.liveness_checks['motion'] = True
+    def analyze_motion(self, prev_gray, gray, face):
+        """
+        Analyze micro-movements with sparse optical flow inside the face
+        
+        Lucas-Kanade flow follows a handful of corner points inside the face
+        box (expanded by `flow_margin`), so background motion does not count
+        and the cost does not grow with the frame size. Points are kept
+        between frames and re-detected only when too many are lost.
         
-        self.prev_gray = gray.copy()
+        Returns:
+            float or None: Mean point displacement in pixels for this frame
+        """
+        if prev_gray is None or prev_gray.shape != gray.shape:
+            self.flow_points = None
+            return None
+        
+        x, y, w, h = face
+        mx, my = int(w * self.flow_margin), int(h * self.flow_margin)
+        frame_h, frame_w = gray.shape[:2]
+        x0, y0 = max(x - mx, 0), max(y - my, 0)
+        x1, y1 = min(x + w + mx, frame_w), min(y + h + my, frame_h)
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        prev_roi = prev_gray[y0:y1, x0:x1]
+        roi = gray[y0:y1, x0:x1]
+        offset = np.array([x0, y0], dtype=np.float32)
+        
+        points = None
+        if self.flow_points is not None and len(self.flow_points) >= self.min_flow_points:
+            points = (self.flow_points - offset).reshape(-1, 1, 2)
+            inside = ((points[:, 0, 0] >= 0) & (points[:, 0, 0] < x1 - x0) &
+                      (points[:, 0, 1] >= 0) & (points[:, 0, 1] < y1 - y0))
+            points = points[inside]
+            if len(points) < self.min_flow_points:
+                points = None
+        if points is None:
+            points = cv2.goodFeaturesToTrack(prev_roi, self.max_flow_points, 0.01, 5)
+            if points is None:
+                self.flow_points = None
+                return None
+            points = points.astype(np.float32)
+        
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(
+            prev_roi, roi, points, None, winSize=(15, 15), maxLevel=2
+        )
+        good = status.reshape(-1) == 1
+        if not good.any():
+            self.flow_points = None
+            return None
+        
+        displacement = np.linalg.norm((moved[good] - points[good]).reshape(-1, 2), axis=1)
+        self.flow_points = moved[good].reshape(-1, 2) + offset
+        motion_score = float(np.mean(displacement))
+        
+        self.motion_scores.append(motion_score)
+        if len(self.motion_scores) >= 5:
+            avg_motion = np.mean(self.motion_scores)
+            # Real people have continuous micro-movements
+            if avg_motion > self.motion_threshold:
+                self.liveness_checks['motion'] = True
+        return motion_score
     
-    def check_liveness(self, frame, face):
+    def check_liveness(self, frame, face, gray=None, prev_gray=None, now=None):
         """
         Main liveness check function
         
         Args:
             frame: Current video frame (BGR)
             face: Detected face coordinates (x, y, w, h)
+            gray: Grayscale frame, if the caller already has it
+            prev_gray: Previous grayscale frame; None uses the frame this
+                detector saw on its last call
+            now: Timestamp of the frame (default: wall clock), so recorded
+                clips can be replayed faster than real time
         
         Returns:
             tuple: (is_live: bool, confidence: float, status: str)
         """
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # Perform all checks
-        self.detect_blink(gray, face)
+        if gray is None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        now = time.time() if now is None else now
+        if prev_gray is None:
+            prev_gray = self.prev_gray
+        # Frames are not modified after conversion, a reference is enough
+        self.prev_gray = gray
+        
+        # Perform all checks, timing each one
+        t0 = time.perf_counter()
+        self.detect_blink(gray, face, now)
+        t1 = time.perf_counter()
         self.detect_head_movement(face)
+        t2 = time.perf_counter()
         self.analyze_texture(gray, face)
-        self.analyze_motion(gray)
+        t3 = time.perf_counter()
+        self.analyze_motion(prev_gray, gray, face)
+        t4 = time.perf_counter()
+        self.check_times = {'blink': t1 - t0, 'movement': t2 - t1,
+                            'texture': t3 - t2, 'motion': t4 - t3}
         
+        return self.evaluate(now)
+    
+    def evaluate(self, now=None):
+        """Turn the checks passed so far into (is_live, confidence, status)"""
         # Calculate elapsed time
-        elapsed_time = time.time() - self.start_time
+        now = time.time() if now is None else now
+        if self.start_time is None:
+            self.start_time = now
+        elapsed_time = now - self.start_time
         
         # Count passed checks
         passed_checks = sum(self.liveness_checks.values())
@@ -215,7 +407,7 @@ class LivenessDetector:
             is_live = False
         else:
             # Check complete
-            if passed_checks >= 3:  # At least 3 out of 4 checks must pass
+            if passed_checks >= self.required_checks:
                 status = "LIVE ✓"
                 is_live = True
             else:
@@ -224,52 +416,121 @@ class LivenessDetector:
         
         return is_live, confidence, status
     
-    def draw_liveness_info(self, frame, face, status, confidence):
+    def draw_liveness_info(self, frame, face, status, confidence, checks=None):
         """Draw liveness detection information on frame"""
-        x, y, w, h = face
-        
-        # Draw status
-        color = (0, 255, 0) if "LIVE" in status else (0, 0, 255) if "SPOOF" in status else (255, 165, 0)
-        
-        # Draw rectangle around face
-        cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
-        
-        # Draw status text
-        cv2.putText(frame, status, (x, y - 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-        
-        # Draw confidence
-        cv2.putText(frame, f"Confidence: {confidence:.0f}%", (x, y - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-        
-        # Draw individual check status
-        check_y = y + h + 20
-        for check_name, passed in self.liveness_checks.items():
-            check_color = (0, 255, 0) if passed else (128, 128, 128)
-            check_text = f"{check_name.capitalize()}: {'✓' if passed else '○'}"
-            cv2.putText(frame, check_text, (x, check_y),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, check_color, 1)
-            check_y += 15
-        
-        return frame
+        checks = self.liveness_checks if checks is None else checks
+        return draw_liveness_info(frame, face, status, confidence, checks)
+
+
+def draw_liveness_info(frame, face, status, confidence, checks):
+    """Draw a liveness status panel for one face"""
+    x, y, w, h = face
+    
+    # Draw status
+    color = (0, 255, 0) if "LIVE" in status else (0, 0, 255) if "SPOOF" in status else (255, 165, 0)
+    
+    # Draw rectangle around face
+    cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
+    
+    # Draw status text
+    cv2.putText(frame, status, (x, y - 30),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+    
+    # Draw confidence
+    cv2.putText(frame, f"Confidence: {confidence:.0f}%", (x, y - 10),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    
+    # Draw individual check status
+    check_y = y + h + 20
+    for check_name, passed in checks.items():
+        check_color = (0, 255, 0) if passed else (128, 128, 128)
+        check_text = f"{check_name.capitalize()}: {'✓' if passed else '○'}"
+        cv2.putText(frame, check_text, (x, check_y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, check_color, 1)
+        check_y += 15
+    
+    return frame
 
 
 class LivenessIntegration:
     """
     Integration wrapper for the existing face recognition system
     
-    This class can be imported and used with minimal changes to existing code
+    Liveness state is kept per tracked face: every track ID gets its own
+    LivenessDetector (blink counter, position history, timers), created on
+    first sight and evicted when the track disappears, so two people in
+    frame never mix signals. `check_faces` evaluates all faces of a frame
+    in one pass on a shared FrameContext (gray image, previous frame).
     """
     
-    def __init__(self):
-        self.detector = LivenessDetector()
+    def __init__(self, settings=None):
+        self.settings = settings or load_settings()
+        self.detectors = {}  # LivenessDetector per track ID
         self.liveness_enabled = True
         self.liveness_results = {}  # Store results per student ID
+        
+        # Per-check latency over recent calls, for the metrics line
+        self.check_stats = {check: StageStats(check) for check in
+                            ('blink', 'movement', 'texture', 'motion')}
+    
+    def get_detector(self, track_id):
+        detector = self.detectors.get(track_id)
+        if detector is None:
+            detector = self.detectors[track_id] = LivenessDetector(self.settings)
+        return detector
+    
+    def evict(self, active_track_ids):
+        """Drop the state of tracks that are no longer in view"""
+        for track_id in [t for t in self.detectors if t not in active_track_ids]:
+            del self.detectors[track_id]
+    
+    def check_faces(self, ctx, faces, draw=True):
+        """
+        Run liveness on several tracked faces of one frame
+        
+        Args:
+            ctx: FrameContext of the frame
+            faces: [(track_id, (x, y, w, h), student_id), ...]
+            draw: Queue liveness overlays on the context
+        
+        Returns:
+            dict: track_id -> liveness_info (is_live, confidence, status, checks)
+        """
+        results = {}
+        for track_id, face, student_id in faces:
+            detector = self.get_detector(track_id)
+            # Motion is measured against the last frame this face was checked on;
+            # blinks and the check window are timed by when the frame was taken
+            is_live, conf, status = detector.check_liveness(ctx.frame, face, ctx.gray,
+                                                            now=ctx.timestamp)
+            for check, seconds in detector.check_times.items():
+                self.check_stats[check].record(seconds)
+            checks = detector.liveness_checks.copy()
+            if draw:
+                ctx.add_overlay(draw_liveness_info, face, status, conf, checks)
+            
+            # Store result if student is recognized
+            if student_id is not None and is_live:
+                self.liveness_results[student_id] = {
+                    'is_live': is_live,
+                    'confidence': conf,
+                    'status': status,
+                    'timestamp': time.time()
+                }
+            
+            results[track_id] = {
+                'is_live': is_live,
+                'confidence': conf,
+                'status': status,
+                'checks': checks,
+                'timings': dict(detector.check_times)
+            }
+        return results
     
     def process_frame_with_liveness(self, frame, faces, recognizer=None, 
                                     student_id=None, confidence=None):
         """
-        Process a frame with liveness detection
+        Process a frame with liveness detection (single face, keyed by student ID)
         
         Args:
             frame: Video frame
@@ -284,38 +545,23 @@ class LivenessIntegration:
         if not self.liveness_enabled or len(faces) == 0:
             return frame, True, "Liveness check disabled"
         
-        # Process the first face
-        face = faces[0]
-        
-        # Run liveness check
-        is_live, conf, status = self.detector.check_liveness(frame, face)
-        
-        # Draw liveness information
-        processed_frame = self.detector.draw_liveness_info(
-            frame.copy(), face, status, conf
-        )
-        
-        # Store result if student is recognized
-        if student_id is not None and is_live:
-            self.liveness_results[student_id] = {
-                'is_live': is_live,
-                'confidence': conf,
-                'status': status,
-                'timestamp': time.time()
-            }
-        
-        liveness_info = {
-            'is_live': is_live,
-            'confidence': conf,
-            'status': status,
-            'checks': self.detector.liveness_checks.copy()
-        }
-        
-        return processed_frame, is_live, liveness_info
+        ctx = FrameContext(frame)
+        info = self.check_faces(ctx, [(student_id, faces[0], student_id)])[student_id]
+        return ctx.render(), info['is_live'], info
+    
+    def reset_detector(self, track_id=None):
+        """Reset one track's liveness state, or everyone's"""
+        if track_id is None:
+            self.detectors.clear()
+        else:
+            self.detectors.pop(track_id, None)
     
-    def reset_detector(self):
-        """Reset the liveness detector"""
-        self.detector.reset()
+    def format_stats(self):
+        """One line of mean per-check latency, e.g. for the pipeline panel"""
+        parts = []
+        for check, stats in self.check_stats.items():
+            parts.append(f"{check} {stats.snapshot()['latency_ms']:.2f} ms")
+        return "Liveness: " + " | ".join(parts)
     
     def enable_liveness(self, enabled=True):
         """Enable or disable liveness detection"""
@@ -330,6 +576,82 @@ class LivenessIntegration:
         self.liveness_results.clear()
 
 
+class LivenessWorker(threading.Thread):
+    """
+    Runs LivenessIntegration off the recognition thread
+    
+    The recognition stage submits the newest frame context with its
+    candidate faces; an older job still waiting is dropped. Verdicts are
+    published per track on `verdicts` as (track_id, student_id, info)
+    tuples, so recognition keeps its frame rate while liveness spends its
+    `check_duration` window on every face. All detector state is touched
+    only from this thread: eviction and resets travel with the jobs, and
+    verdicts of jobs submitted before a reset are dropped by `drain()`.
+    """
+    
+    def __init__(self, integration):
+        super().__init__(name="liveness", daemon=True)
+        self.integration = integration
+        self.stats = StageStats("liveness")
+        self.jobs = DropOldestQueue(maxsize=1, stats=self.stats)
+        self.verdicts = queue.Queue()
+        self._reset = threading.Event()
+        self._clear_results = threading.Event()
+        self._generation = 0
+        self._stop_event = threading.Event()
+    
+    def submit(self, ctx, faces, active_track_ids):
+        """Queue one frame's candidate faces [(track_id, box, student_id), ...]"""
+        self.jobs.put((self._generation, ctx, faces, set(active_track_ids)))
+    
+    def reset(self, clear_results=False):
+        """Drop all per-track state (and optionally the results) before the next job"""
+        self._generation += 1
+        self.jobs.clear()
+        if clear_results:
+            self._clear_results.set()
+        self._reset.set()
+    
+    def drain(self):
+        """Return every verdict published since the last call and the last reset"""
+        verdicts = []
+        while True:
+            try:
+                generation, *verdict = self.verdicts.get_nowait()
+            except queue.Empty:
+                return verdicts
+            if generation == self._generation:
+                verdicts.append(tuple(verdict))
+    
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+    
+    def run(self):
+        while not self._stop_event.is_set():
+            job = self.jobs.get(timeout=0.1)
+            if self._reset.is_set():
+                self._reset.clear()
+                self.integration.reset_detector()
+                if self._clear_results.is_set():
+                    self._clear_results.clear()
+                    self.integration.clear_results()
+            if job is None:
+                continue
+            generation, ctx, faces, active_track_ids = job
+            start = time.perf_counter()
+            self.integration.evict(active_track_ids)
+            try:
+                results = self.integration.check_faces(ctx, faces, draw=False)
+            except Exception as e:
+                print(f"Liveness error: {e}")
+                continue
+            self.stats.record(time.perf_counter() - start)
+            for track_id, _, student_id in faces:
+                self.verdicts.put((generation, track_id, student_id, results[track_id]))
+
+
 # Example usage with the existing face recognition module
 """
 To integrate with face_recognition_module.py:
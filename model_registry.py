@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime
+
+from app_settings import load_settings
+from recognizer_backends import LBPH_MODEL_PATH
+
+REGISTRY_DIR = "trainer"
+MODEL_FILE = "trainer.yml"
+GALLERY_FILE = "embeddings.npz"
+
+
+def atomic_copy(src, dst):
+    """Copy `src` over `dst` so readers see either the old or the new file"""
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    temp_path = dst + ".tmp"
+    shutil.copyfile(src, temp_path)
+    os.replace(temp_path, dst)
+
+
+def write_json(path, data):
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=1)
+    os.replace(temp_path, path)
+
+
+class ModelRegistry:
+    """
+    Versioned trained models under trainer/
+
+    Each training run writes a new directory trainer/models/v0001, v0002,
+    ... holding the model files and metadata.json (sample and face counts,
+    per-student counts, training time, evaluation accuracy and the samples
+    it was trained on). `activate()` publishes a version: its files are
+    copied over the live paths (trainer/trainer.yml and the embedding
+    gallery) with os.replace, then trainer/current.json is switched the
+    same way; activating a version without a gallery removes the live one,
+    so a model is never paired with another version's gallery. A recognizer reading the live model always gets a complete
+    file, the ModelWatcher reloads it on the change, and `rollback()` makes
+    an older version live again.
+    """
+
+    def __init__(self, root=REGISTRY_DIR, settings=None):
+        self.root = root
+        self.settings = settings or load_settings()
+        self.models_dir = os.path.join(root, "models")
+        self.pointer_path = os.path.join(root, "current.json")
+
+    def version_dir(self, version):
+        return os.path.join(self.models_dir, f"v{version:04d}")
+
+    def model_path(self, version):
+        return os.path.join(self.version_dir(version), MODEL_FILE)
+
+    def gallery_path(self, version):
+        return os.path.join(self.version_dir(version), GALLERY_FILE)
+
+    def versions(self):
+        """Versions that finished training, oldest first"""
+        if not os.path.isdir(self.models_dir):
+            return []
+        versions = []
+        for name in os.listdir(self.models_dir):
+            if name.startswith('v') and name[1:].isdigit() and \
+                    os.path.exists(os.path.join(self.models_dir, name, "metadata.json")):
+                versions.append(int(name[1:]))
+        return sorted(versions)
+
+    def current_version(self):
+        """The live version, or None before the first publish"""
+        try:
+            with open(self.pointer_path, 'r') as f:
+                return int(json.load(f)["version"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def metadata(self, version):
+        """A version's metadata.json, or {} if it cannot be read"""
+        if version is None:
+            return {}
+        try:
+            with open(os.path.join(self.version_dir(version), "metadata.json"), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def new_version(self):
+        """Create and return the next version number and its empty directory"""
+        existing = []
+        if os.path.isdir(self.models_dir):
+            existing = [int(name[1:]) for name in os.listdir(self.models_dir)
+                        if name.startswith('v') and name[1:].isdigit()]
+        version = max(existing, default=0) + 1
+        os.makedirs(self.version_dir(version))
+        return version
+
+    def publish(self, version, metadata):
+        """Record a trained version's metadata and make it the live model"""
+        metadata = dict(metadata, version=version,
+                        created=datetime.now().isoformat(timespec='seconds'))
+        write_json(os.path.join(self.version_dir(version), "metadata.json"), metadata)
+        self.activate(version)
+        self.prune()
+
+    def activate(self, version):
+        """Mirror a version onto the live model paths, then switch the pointer"""
+        if version not in self.versions():
+            raise ValueError(f"Model version {version} does not exist")
+        atomic_copy(self.model_path(version), LBPH_MODEL_PATH)
+        if os.path.exists(self.gallery_path(version)):
+            atomic_copy(self.gallery_path(version), self.settings["embedding_gallery"])
+        elif os.path.exists(self.settings["embedding_gallery"]):
+            os.remove(self.settings["embedding_gallery"])
+        write_json(self.pointer_path, {"version": version})
+
+    def rollback(self, version=None):
+        """
+        Make an older version live (default: the one before the current)
+
+        Returns:
+            int: The version now live
+        """
+        current = self.current_version()
+        if version is None:
+            older = [v for v in self.versions() if current is None or v < current]
+            if not older:
+                raise ValueError("No older model version to roll back to")
+            version = older[-1]
+        self.activate(version)
+        return version
+
+    def prune(self):
+        """Delete the oldest versions beyond model_versions_kept (never the live one)"""
+        keep = int(self.settings["model_versions_kept"])
+        if keep <= 0:
+            return
+        current = self.current_version()
+        for version in self.versions()[:-keep]:
+            if version != current:
+                shutil.rmtree(self.version_dir(version), ignore_errors=True)
+
+
+def format_version(version, metadata, current):
+    accuracy = metadata.get("eval_accuracy")
+    return (f"{'*' if version == current else ' '} v{version:04d}  {metadata.get('created', '?')}  "
+            f"{metadata.get('mode', '?'):<11} faces {metadata.get('face_count', 0):>6}  "
+            f"students {len(metadata.get('students', {})):>4}  "
+            f"accuracy {f'{accuracy * 100:.1f}%' if accuracy is not None else 'n/a':>6}  "
+            f"{metadata.get('training_seconds', 0):.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List, activate or roll back trained models")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="show every model version (* = live)")
+    rollback = subparsers.add_parser("rollback", help="make an older version live")
+    rollback.add_argument("version", type=int, nargs="?",
+                          help="version to activate (default: the one before the live one)")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry()
+    if args.command == "list":
+        current = registry.current_version()
+        versions = registry.versions()
+        if not versions:
+            print("No model versions yet")
+        for version in versions:
+            print(format_version(version, registry.metadata(version), current))
+    else:
+        try:
+            version = registry.rollback(args.version)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        print(f"Model version {version} is now live")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import threading
+import time
+
+
+def file_signature(paths):
+    """(mtime, size) of every path, None for missing files"""
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class ModelWatcher:
+    """
+    Background reloader for the trained recognizer model
+
+    Polls the backend's model files every `interval` seconds. When their
+    mtime / size change, it waits until they have been unchanged for
+    `settle_time` seconds (training may still be writing), builds a fresh
+    backend with `factory()` and loads it on this thread, then hands it to
+    `on_loaded(backend)`. The consumer swaps it in between frames, so
+    recognition never waits on a model read. With `load=False` the backend
+    is handed over unloaded, for consumers that load the model elsewhere
+    (e.g. in worker processes).
+    """
+
+    def __init__(self, factory, on_loaded, interval=2.0, settle_time=1.0, load=True):
+        self.factory = factory
+        self.on_loaded = on_loaded
+        self.interval = interval
+        self.settle_time = settle_time
+        self.load = load
+        self.files = factory().files
+        self._loaded = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, loaded=False):
+        """Start watching; `loaded` means the current files are already in use"""
+        self._loaded = file_signature(self.files) if loaded else None
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        seen = None
+        changed_at = 0.0
+        while not self._stop_event.wait(self.interval):
+            signature = file_signature(self.files)
+            if signature == self._loaded or None in signature:
+                seen = None
+                continue
+            if signature != seen:
+                # Still being written: wait for it to settle
+                seen = signature
+                changed_at = time.monotonic()
+                continue
+            if time.monotonic() - changed_at < self.settle_time:
+                continue
+
+            self._loaded = signature
+            try:
+                backend = self.factory()
+                if self.load:
+                    backend.load()
+            except Exception as e:
+                print(f"Error reloading model: {e}")
+                continue
+            self.on_loaded(backend)
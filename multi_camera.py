@@ -0,0 +1,278 @@
+import argparse
+import math
+import multiprocessing
+import os
+import threading
+import time
+from datetime import datetime
+from functools import partial
+
+import cv2
+
+from app_settings import load_settings
+from face_processing import FaceDetector, preprocess_faces
+from frame_sources import open_frame_source
+from recognition_engine import RecognitionEngine
+from recognizer_backends import create_backend
+from video_pipeline import CaptureThread, DropOldestQueue, StageStats
+
+# Per-process state of a pool worker, filled once by init_worker
+_worker = {}
+
+
+def init_worker(settings):
+    """Pool initializer: build the detector and load the model once per process"""
+    # One OpenCV thread per process; the pool provides the parallelism
+    cv2.setNumThreads(1)
+    _worker['detector'] = FaceDetector(settings=settings)
+    # Score LBPH batches inline rather than on a per-process thread pool
+    backend = create_backend(dict(settings, predict_threads=1))
+    try:
+        backend.load()
+    except Exception as e:
+        # A failing initializer would make the pool respawn workers forever;
+        # report faces as unrecognized until the next good model instead
+        print(f"Worker {os.getpid()} could not load the model: {e}")
+        backend = None
+    _worker['backend'] = backend
+
+
+def recognize_frame(gray):
+    """
+    Pool task: detect and identify every face in one grayscale frame
+
+    Returns:
+        list: [((x, y, w, h), student_id, confidence), ...]
+    """
+    boxes = _worker['detector'].detect(gray)
+    if not boxes:
+        return []
+    if _worker['backend'] is None:
+        return [(box, None, None) for box in boxes]
+    faces = preprocess_faces([gray[y:y+h, x:x+w] for x, y, w, h in boxes])
+    try:
+        predictions = _worker['backend'].predict_batch(faces)
+    except Exception:
+        predictions = [(None, None)] * len(boxes)
+    return [(box, id_, confidence) for box, (id_, confidence) in zip(boxes, predictions)]
+
+
+class CameraFeed:
+    """One source of a MultiCameraEngine: its reader thread, newest frame and stats"""
+
+    def __init__(self, index, source, stop_event):
+        self.index = index
+        self.source = source
+        self.cap = open_frame_source(source)
+        self.name = getattr(self.cap, 'name', str(source))
+        self.stats = StageStats(self.name)
+        self.frames = DropOldestQueue(maxsize=1, stats=self.stats)
+        self.reader = CaptureThread(self.cap, self.frames, StageStats("capture"), stop_event)
+        self.inflight = 0
+        self.faces = []
+
+
+class MultiCameraEngine(RecognitionEngine):
+    """
+    Recognition over several cameras / streams with a process pool
+
+    Each source has its own capture thread that keeps only the newest
+    frame. A dispatcher thread converts frames to grayscale and submits
+    them to a multiprocessing pool whose workers hold their own detector
+    and recognizer (loaded once by the pool initializer), so throughput
+    scales with CPU cores rather than with open windows. Results come back
+    on the pool's result thread and are merged into the single attendance
+    stream of RecognitionEngine: a student seen by two entrances is marked
+    once per session.
+    """
+
+    def __init__(self, sources, workers=None, settings=None, attendance_dir="attendance"):
+        super().__init__(settings, attendance_dir)
+        # Liveness is stateful per face stream and is not run in the pool
+        self.liveness_enabled = False
+        self.sources = list(sources)
+        self.workers = workers or self.settings["recognition_workers"] or os.cpu_count() or 1
+        self.pool = None
+        self.feeds = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._dispatcher = None
+
+    def load_model(self):
+        """Workers load the model themselves; only check that it exists"""
+        if not self.recognizer.model_exists:
+            raise FileNotFoundError("No trained model found.")
+        self.model_loaded = True
+
+    def watch_model(self):
+        """
+        Restart the worker pool when training rewrites the model
+
+        The parent only notices the file change; the model itself is loaded
+        by the new workers, never in this process.
+        """
+        super().watch_model(load=False)
+
+    def _swap_model(self):
+        """Replace the worker pool so every worker loads the new model"""
+        super()._swap_model()
+        old = self.pool
+        self.pool = multiprocessing.Pool(self.workers, initializer=init_worker,
+                                         initargs=(self.settings,))
+        # Frames already submitted finish on the old workers
+        old.close()
+        threading.Thread(target=old.join, daemon=True).start()
+
+    def start(self):
+        """Open every source, start the worker pool and the dispatcher"""
+        self._stop_event.clear()
+        self.feeds = [CameraFeed(i, source, self._stop_event)
+                      for i, source in enumerate(self.sources)]
+        closed = [feed.name for feed in self.feeds if not feed.cap.isOpened()]
+        if closed:
+            for feed in self.feeds:
+                feed.cap.release()
+            self.feeds = []
+            raise RuntimeError(f"Could not open source(s): {', '.join(closed)}")
+
+        self.start_session()
+        self.pool = multiprocessing.Pool(self.workers, initializer=init_worker,
+                                         initargs=(self.settings,))
+        for feed in self.feeds:
+            feed.reader.start()
+        self._dispatcher = threading.Thread(target=self._dispatch, name="dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout)
+            self._dispatcher = None
+        for feed in self.feeds:
+            if feed.reader.is_alive():
+                feed.reader.join(timeout)
+            feed.cap.release()
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    @property
+    def ended(self):
+        """True once every source is a finished file or directory and its frames are done"""
+        with self._lock:
+            return all(feed.reader.ended.is_set() and len(feed.frames) == 0
+                       and feed.inflight == 0 for feed in self.feeds)
+
+    def _dispatch(self):
+        # Enough frames in flight per camera to keep every worker busy
+        per_feed = max(1, math.ceil(self.workers / max(1, len(self.feeds))))
+        while not self._stop_event.is_set():
+            if self._next_recognizer is not None:
+                self._swap_model()
+            submitted = False
+            for feed in self.feeds:
+                with self._lock:
+                    if feed.inflight >= per_feed:
+                        continue
+                frame = feed.frames.get_nowait()
+                if frame is None:
+                    continue
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                with self._lock:
+                    feed.inflight += 1
+                self.pool.apply_async(
+                    recognize_frame, (gray,),
+                    callback=partial(self._on_result, feed, time.perf_counter()),
+                    error_callback=partial(self._on_error, feed)
+                )
+                submitted = True
+            if not submitted:
+                time.sleep(0.005)
+
+    def _on_result(self, feed, submitted_at, faces):
+        """Runs on the pool's result thread: merge one frame into attendance"""
+        with self._lock:
+            feed.inflight -= 1
+        feed.stats.record(time.perf_counter() - submitted_at)
+        feed.faces = faces
+        self.faces_in_frame = sum(len(f.faces) for f in self.feeds)
+
+        for box, id_, confidence in faces:
+            if id_ is None or confidence >= 100 - self.confidence_threshold:
+                continue
+            with self._lock:
+                if id_ in self.recognized_students:
+                    continue
+                self.recognized_students.add(id_)
+            self.mark_attendance(id_, self.get_student_name(id_),
+                                 f"{round(100 - confidence)}%", camera=feed.name)
+
+    def _on_error(self, feed, error):
+        with self._lock:
+            feed.inflight -= 1
+        print(f"Recognition error on {feed.name}: {error}")
+
+    def format_stats(self):
+        lines = []
+        for feed in self.feeds:
+            s = feed.stats.snapshot()
+            lines.append(f"{feed.name}: {s['fps']:.1f} fps | {s['latency_ms']:.1f} ms | "
+                         f"faces {len(feed.faces)} | dropped {s['dropped']}")
+        return "\n".join(lines)
+
+    def close(self):
+        self.stop()
+        super().close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-camera face recognition attendance")
+    parser.add_argument("--source", action="append",
+                        help="camera index, stream URL, video file or image directory "
+                             "(repeat for each entrance; default: camera_source from settings.json)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="recognition processes (default: recognition_workers or CPU count)")
+    parser.add_argument("--stats-interval", type=float, default=5.0,
+                        help="seconds between metrics lines")
+    args = parser.parse_args(argv)
+
+    settings = load_settings()
+    engine = MultiCameraEngine(args.source or [settings["camera_source"]],
+                               workers=args.workers or None, settings=settings)
+    try:
+        engine.load_model()
+        engine.start()
+        engine.watch_model()
+    except Exception as e:
+        engine.close()
+        raise SystemExit(str(e))
+    print(f"[{datetime.now():%H:%M:%S}] Recognition running on {len(engine.feeds)} source(s) "
+          f"with {engine.workers} worker(s) (Ctrl+C to stop)")
+
+    def print_events():
+        for event in engine.drain_events():
+            print(f"[{event['time']}] PRESENT {event['student_id']} {event['name']} "
+                  f"confidence={event['confidence']} camera={event['camera']}")
+
+    last_stats = time.monotonic()
+    try:
+        while not engine.ended:
+            time.sleep(0.1)
+            print_events()
+            if time.monotonic() - last_stats >= args.stats_interval:
+                last_stats = time.monotonic()
+                print(f"[{datetime.now():%H:%M:%S}] METRICS "
+                      f"{engine.format_stats().replace(chr(10), ' || ')} "
+                      f"|| present={len(engine.recognized_students)}")
+        print(f"[{datetime.now():%H:%M:%S}] All sources ended")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.close()
+        print_events()
+        print(f"[{datetime.now():%H:%M:%S}] Stopped. {len(engine.recognized_students)} students marked present.")
+
+
+if __name__ == "__main__":
+    main()
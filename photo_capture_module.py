@@ -1,10 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import cv2
-from PIL import Image, ImageTk
 import os
 from datetime import datetime
 
+from app_settings import load_settings
+from face_processing import FaceDetector, preprocess_face
+from frame_display import FrameDisplay
+from frame_sources import open_frame_source
+from sample_manifest import SampleManifest
+
 class PhotoCaptureModule:
     def __init__(self, parent, student_id=None, student_name=None):
         self.parent = parent
@@ -26,12 +31,14 @@ class PhotoCaptureModule:
         self.photo_count = 0
         self.max_photos = 100
         
-        # Face detection
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        # Face detection (downscaled, bounds from settings.json)
+        self.face_detector = FaceDetector()
         
         # Create data directory
         self.data_dir = "data"
         os.makedirs(self.data_dir, exist_ok=True)
+        # Marks saved crops as aligned so training skips detection on them
+        self.manifest = SampleManifest(self.data_dir)
         
         self.create_ui()
         
@@ -71,6 +78,8 @@ class PhotoCaptureModule:
         # Video display
         self.video_label = tk.Label(video_frame, bg='black')
         self.video_label.pack(padx=10, pady=10, fill='both', expand=True)
+        self.display = FrameDisplay(self.video_label,
+                                    max_fps=load_settings()["display_fps"])
         
         # Instructions
         instructions = """
@@ -181,7 +190,7 @@ class PhotoCaptureModule:
             return
         
         try:
-            self.cap = cv2.VideoCapture(0)
+            self.cap = open_frame_source(load_settings()["camera_source"])
             if not self.cap.isOpened():
                 messagebox.showerror("Error", "Could not open camera!")
                 return
@@ -202,16 +211,23 @@ class PhotoCaptureModule:
         self.is_running = False
         if self.cap is not None:
             self.cap.release()
+        self.save_manifest()
         
         self.start_btn.config(state='normal')
         self.stop_btn.config(state='disabled')
         self.status_label.config(text="Status: Stopped", fg='#e74c3c')
-        self.video_label.config(image='', bg='black')
+        self.display.clear()
         
         if self.photo_count > 0:
             messagebox.showinfo("Capture Complete", 
                 f"Captured {self.photo_count} photos successfully!\n\nYou can now train the model.")
     
+    def save_manifest(self):
+        try:
+            self.manifest.save()
+        except OSError as e:
+            print(f"Error saving sample manifest: {e}")
+    
     def process_capture(self):
         """Process video frames and capture photos"""
         if not self.is_running or self.photo_count >= self.max_photos:
@@ -224,7 +240,7 @@ class PhotoCaptureModule:
         ret, frame = self.cap.read()
         if ret:
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+            faces = self.face_detector.detect(gray)
             
             self.faces_detected_label.config(text=f"Faces Detected: {len(faces)}")
             
@@ -234,13 +250,14 @@ class PhotoCaptureModule:
                 
                 # Save face image
                 if self.photo_count < self.max_photos:
-                    face_img = gray[y:y+h, x:x+w]
+                    face_img = preprocess_face(gray[y:y+h, x:x+w])
                     
                     # Save with format: User.StudentID.PhotoNumber.jpg
                     filename = f"User.{self.student_id}.{self.photo_count + 1}.jpg"
                     filepath = os.path.join(self.data_dir, filename)
                     
                     cv2.imwrite(filepath, face_img)
+                    self.manifest.add(filename, self.student_id)
                     
                     self.photo_count += 1
                     self.progress_bar['value'] = self.photo_count
@@ -254,13 +271,7 @@ class PhotoCaptureModule:
                           (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
             
             # Convert and display frame
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame_rgb)
-            img = img.resize((640, 480), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(image=img)
-            
-            self.video_label.config(image=photo)
-            self.video_label.image = photo
+            self.display.show(self.display.prepare(frame))
         
         if self.is_running:
             self.window.after(50, self.process_capture)  # Capture every 50ms
@@ -0,0 +1,194 @@
+import argparse
+import csv
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from frame_sources import ImageDirectorySource, open_frame_source
+from recognition_engine import RecognitionEngine
+
+SAMPLE_NAME = re.compile(r"User\.(\d+)\.")
+STAGE_ORDER = ['read', 'convert', 'detect', 'track', 'predict', 'liveness', 'total']
+
+
+def load_labels(path):
+    """
+    Read ground truth from a CSV with `frame,student_id` columns
+
+    Frame numbers are 0-based. A frame may appear on several rows (several
+    people); frames that are not listed, or whose student_id is empty or
+    -1, have nobody known in view.
+    """
+    labels = {}
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            frame_no = int(row['frame'])
+            ids = labels.setdefault(frame_no, set())
+            sid = (row.get('student_id') or '').strip()
+            if sid and sid != '-1':
+                ids.add(int(sid))
+    return labels
+
+
+def label_from_filename(path):
+    """Student ID from a `User.<id>.<n>.jpg` sample name, else None"""
+    match = SAMPLE_NAME.search(os.path.basename(path or ''))
+    return {int(match.group(1))} if match else None
+
+
+def percentiles(values):
+    if not values:
+        return None
+    p50, p95, p99 = np.percentile(np.asarray(values) * 1000.0, [50, 95, 99])
+    return {'count': len(values), 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99}
+
+
+def run_benchmark(source, labels_path=None, max_frames=0, warmup=5,
+                  realtime=False, liveness=False):
+    """
+    Replay a clip through RecognitionEngine.process_frame and collect metrics
+
+    Returns:
+        Report dict with fps, per-stage latency percentiles, recognitions
+        per second and accuracy (None when there is no ground truth).
+    """
+    cap = open_frame_source(source, realtime=realtime)
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open source {source}")
+
+    labels = load_labels(labels_path) if labels_path else None
+    by_filename = labels is None and isinstance(cap, ImageDirectorySource)
+
+    # Attendance goes to a scratch directory so benchmarks never touch real records
+    scratch = tempfile.mkdtemp(prefix="benchmark_attendance_")
+    engine = RecognitionEngine(attendance_dir=scratch)
+    engine.load_model()
+    engine.set_liveness_enabled(liveness)
+    engine.start_session()
+
+    samples = {stage: [] for stage in STAGE_ORDER}
+    frames = 0
+    predict_calls = 0
+    identified = 0
+    labelled_faces = hits = false_accepts = 0
+    elapsed = 0.0
+
+    try:
+        frame_no = -1
+        while not max_frames or frames < max_frames:
+            t0 = time.perf_counter()
+            ret, frame = cap.read()
+            t_read = time.perf_counter() - t0
+            if not ret:
+                break
+            frame_no += 1
+
+            calls_before = engine.tracker.predict_calls
+            if isinstance(cap, ImageDirectorySource):
+                # Unrelated images: never carry an identity from one to the next
+                engine.tracker.clear_tracks()
+            # Replay on the clip's clock so the identity cache TTL means what it
+            # does live; cameras have no clock of their own
+            fps = getattr(cap, 'fps', None)
+            now = cap.frame_index / fps if fps else None
+            engine.process_frame(frame, now)
+            frame_time = time.perf_counter() - t0
+
+            if frame_no < warmup:
+                continue
+
+            frames += 1
+            elapsed += frame_time
+            samples['read'].append(t_read)
+            for stage, value in engine.last_timings.items():
+                if stage in ('predict', 'liveness') and value == 0:
+                    continue
+                samples[stage].append(value)
+
+            predict_calls += engine.tracker.predict_calls - calls_before
+            found = {sid for _, sid, _ in engine.last_results if sid is not None}
+            identified += len(found)
+
+            if labels is not None:
+                expected = labels.get(frame_no, set())
+            elif by_filename:
+                expected = label_from_filename(cap.current_file)
+            else:
+                expected = None
+            if expected is not None:
+                labelled_faces += len(expected)
+                hits += len(found & expected)
+                false_accepts += len(found - expected)
+    finally:
+        cap.release()
+        engine.close()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    has_truth = labels is not None or by_filename
+    return {
+        'source': str(source),
+        'backend': engine.recognizer.name,
+        'frames': frames,
+        'seconds': elapsed,
+        'fps': frames / elapsed if elapsed else 0.0,
+        'stages': {stage: percentiles(values) for stage, values in samples.items() if values},
+        'recognitions_per_sec': predict_calls / elapsed if elapsed else 0.0,
+        'identified_per_sec': identified / elapsed if elapsed else 0.0,
+        'accuracy': hits / labelled_faces if has_truth and labelled_faces else None,
+        'labelled_faces': labelled_faces,
+        'false_accepts': false_accepts,
+        'tracker': engine.format_stats()
+    }
+
+
+def format_report(report):
+    lines = [
+        f"Source:   {report['source']} ({report['backend']})",
+        f"Frames:   {report['frames']} in {report['seconds']:.2f}s -> {report['fps']:.1f} FPS",
+        f"{'stage':<10}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+    ]
+    for stage in STAGE_ORDER:
+        s = report['stages'].get(stage)
+        if s:
+            lines.append(f"{stage:<10}{s['count']:>7}{s['p50_ms']:>10.2f}"
+                         f"{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+    lines.append(f"Recognitions/s: {report['recognitions_per_sec']:.1f} "
+                 f"(identified faces/s: {report['identified_per_sec']:.1f})")
+    if report['accuracy'] is None:
+        lines.append("Accuracy: n/a (no labelled faces)")
+    else:
+        lines.append(f"Accuracy: {report['accuracy'] * 100:.1f}% of {report['labelled_faces']} "
+                     f"labelled faces, {report['false_accepts']} false accepts")
+    lines.append(report['tracker'])
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay a labelled clip through the recognition engine and report performance")
+    parser.add_argument("source", help="video file, image directory or camera index")
+    parser.add_argument("--labels", help="ground truth CSV with frame,student_id columns "
+                                         "(image directories default to User.<id>.<n> file names)")
+    parser.add_argument("--max-frames", type=int, default=0, help="stop after N measured frames")
+    parser.add_argument("--warmup", type=int, default=5, help="frames excluded from the statistics")
+    parser.add_argument("--realtime", action="store_true",
+                        help="replay at the clip's frame rate instead of as fast as possible")
+    parser.add_argument("--liveness", action="store_true", help="include liveness checks")
+    parser.add_argument("--json", help="also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.source, args.labels, args.max_frames, args.warmup,
+                           args.realtime, args.liveness)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+import argparse
+import os
+import queue
+import time
+from datetime import datetime
+
+from app_settings import load_settings
+from attendance_writer import AttendanceWriter
+from face_processing import FaceDetector, preprocess_faces
+from face_tracker import FaceTracker
+from frame_context import FrameContext
+from frame_sources import open_frame_source
+from model_watcher import ModelWatcher
+from recognizer_backends import create_backend
+from student_registry import StudentRegistry
+from video_pipeline import AdaptiveScheduler, VideoPipeline
+
+# Import liveness detection (optional)
+try:
+    from liveness_detection_module import LivenessIntegration, LivenessWorker, draw_liveness_info
+    LIVENESS_AVAILABLE = True
+except ImportError:
+    LIVENESS_AVAILABLE = False
+
+
+class RecognitionEngine:
+    """
+    UI-free face recognition attendance engine
+
+    Owns detection, tracking, recognition, liveness and attendance writing.
+    `process_frame()` analyses one BGR frame and returns its FrameContext,
+    with annotations queued for the render stage to draw (`ctx.render()`);
+    it is meant to run on the recognition stage of a VideoPipeline. Every
+    newly marked student is written through the AttendanceWriter and
+    published on `attendance_events` as a dict, so a Tk view or a console
+    logger can consume them on its own thread.
+    """
+
+    def __init__(self, settings=None, attendance_dir="attendance"):
+        settings = settings or load_settings()
+        self.settings = settings
+        self.attendance_dir = attendance_dir
+
+        # Initialize face detection (downscaled, bounds from settings.json)
+        self.face_detector = FaceDetector(settings=settings)
+
+        # Recognizer backend (LBPH or DNN embeddings) selected in settings.json
+        self.recognizer = create_backend(settings)
+        self.model_loaded = False
+
+        # Retrained models are loaded in the background and swapped in between frames
+        self.model_watcher = None
+        self.model_generation = 0
+        self._next_recognizer = None
+
+        # Set by reset_session, applied by the recognition thread
+        self._reset_requested = False
+
+        # Tracks faces between frames so each person is predicted once
+        self.tracker = FaceTracker()
+
+        # Tunes how often full detection runs to hold the target frame rate
+        self.scheduler = AdaptiveScheduler(
+            target_fps=settings["target_fps"],
+            max_detect_interval=settings["max_detect_interval"],
+            idle_after=settings["idle_after"],
+            idle_fps=settings["idle_fps"]
+        )
+
+        # Recognition variables
+        self.students = StudentRegistry.shared()
+        self.recognized_students = set()
+        self.confidence_threshold = 50
+        self.faces_in_frame = 0
+
+        # Per-frame instrumentation, read by recognition_benchmark
+        self.last_timings = {}
+        self.last_results = []
+
+        # Newly marked attendance, consumed by the view / CLI
+        self.attendance_events = queue.Queue()
+
+        # Attendance rows are written in batches by a background thread
+        self.attendance_writer = AttendanceWriter(
+            batch_size=settings["attendance_batch_size"],
+            flush_interval=settings["attendance_flush_interval"],
+            fsync_interval=settings["attendance_fsync_interval"]
+        )
+
+        # Liveness detection integration, evaluated on a worker thread
+        self.liveness = None
+        self.liveness_enabled = False
+        self.liveness_worker = None
+        self.liveness_verdicts = {}     # latest liveness_info per track ID
+        self._liveness_pending = {}     # track ID -> confidence text when submitted
+        if LIVENESS_AVAILABLE:
+            try:
+                self.liveness = LivenessIntegration(settings)
+                self.liveness_worker = LivenessWorker(self.liveness)
+                self.liveness_enabled = True
+            except Exception:
+                self.liveness = None
+
+    def load_model(self):
+        """Load the trained model; raises if it is missing or unreadable"""
+        if not self.recognizer.model_exists:
+            raise FileNotFoundError("No trained model found.")
+        self.recognizer.load()
+        self.model_loaded = True
+
+    def watch_model(self, load=True):
+        """Reload the model automatically whenever training rewrites it"""
+        if self.model_watcher is not None:
+            return
+        self.model_watcher = ModelWatcher(
+            lambda: create_backend(self.settings), self._model_ready,
+            interval=self.settings["model_check_interval"],
+            settle_time=self.settings["model_settle_time"],
+            load=load
+        )
+        self.model_watcher.start(loaded=self.model_loaded)
+
+    def _model_ready(self, backend):
+        # Called on the watcher thread; the swap itself happens between frames
+        self._next_recognizer = backend
+
+    def _swap_model(self):
+        backend, self._next_recognizer = self._next_recognizer, None
+        old, self.recognizer = self.recognizer, backend
+        self.model_loaded = True
+        self.model_generation += 1
+        # Identities cached under the old model are no longer trustworthy
+        self.tracker.clear_identities()
+        old.close()
+        print(f"[{datetime.now():%H:%M:%S}] Model reloaded ({backend.name}, "
+              f"generation {self.model_generation})")
+
+    def set_liveness_enabled(self, enabled):
+        if self.liveness:
+            self.liveness_enabled = enabled
+            self.liveness.enable_liveness(enabled)
+            self._start_liveness_worker()
+
+    def _start_liveness_worker(self):
+        # The worker thread only runs once liveness is actually used
+        if self.liveness_enabled and not self.liveness_worker.is_alive():
+            self.liveness_worker.start()
+
+    def start_session(self):
+        """Reset per-run state before a camera starts"""
+        if self._reset_requested:
+            self._reset_session()
+        if self.liveness:
+            self.reset_liveness()
+            self._start_liveness_worker()
+        self.tracker.reset()
+        self.scheduler.reset()
+
+    def reset_session(self):
+        """
+        Forget who has been marked present in this session
+
+        Safe to call from the UI thread: the reset is done by the
+        recognition thread before its next frame (or by start_session).
+        """
+        self._reset_requested = True
+
+    def _reset_session(self):
+        self._reset_requested = False
+        self.recognized_students.clear()
+        if self.liveness:
+            self.reset_liveness(clear_results=True)
+
+    def reset_liveness(self, clear_results=False):
+        self.liveness_worker.reset(clear_results)
+        self.liveness_worker.drain()
+        self.liveness_verdicts.clear()
+        self._liveness_pending.clear()
+
+    def collect_liveness(self):
+        """Apply verdicts from the liveness worker; LIVE ones mark attendance"""
+        for track_id, student_id, info in self.liveness_worker.drain():
+            self.liveness_verdicts[track_id] = info
+            if info['is_live'] and student_id not in self.recognized_students:
+                self.recognized_students.add(student_id)
+                confidence_text = self._liveness_pending.get(track_id, "N/A")
+                self.mark_attendance(student_id, self.get_student_name(student_id),
+                                     confidence_text, info['status'])
+        # Forget verdicts of tracks that have left the frame
+        for track_id in [t for t in self.liveness_verdicts if t not in self.tracker.tracks]:
+            del self.liveness_verdicts[track_id]
+            self._liveness_pending.pop(track_id, None)
+
+    def process_frame(self, frame, now=None):
+        """
+        Detect, recognize and check liveness on one BGR frame; returns its FrameContext
+
+        `now` is the frame's timestamp in seconds (default: wall clock). It
+        drives the tracker's identity cache, the scheduler and liveness, so
+        a recorded clip can be replayed on its own clock.
+        """
+        if self._next_recognizer is not None:
+            self._swap_model()
+        if self._reset_requested:
+            self._reset_session()
+        now = time.time() if now is None else now
+        start = time.perf_counter()
+        ctx = FrameContext(frame, timestamp=now)
+        gray = ctx.gray
+        t_detect = time.perf_counter()
+
+        # Full detection every N frames, tracker-only updates in between
+        detect = self.scheduler.should_detect(has_tracks=bool(self.tracker.tracks), now=now)
+        if detect:
+            tracks = self.tracker.update(self.face_detector.detect_context(ctx), now)
+        else:
+            tracks = self.tracker.advance(now)
+        t_tracked = time.perf_counter()
+
+        self.faces_in_frame = len(tracks)
+        frame_h, frame_w = gray.shape[:2]
+        predict_time = 0.0
+        liveness_time = 0.0
+        results = []
+
+        boxes = []
+        for track in tracks:
+            x, y, w, h = track.box
+            x, y = min(max(x, 0), frame_w - 1), min(max(y, 0), frame_h - 1)
+            w, h = min(w, frame_w - x), min(h, frame_h - y)
+            boxes.append((x, y, w, h))
+
+        # Only run the recognizer for new, drifted or stale tracks on detection frames,
+        # all of them in one batch
+        pending = [i for i, track in enumerate(tracks)
+                   if detect and self.tracker.needs_prediction(track, now)]
+        if pending:
+            t0 = time.perf_counter()
+            faces = preprocess_faces([gray[y:y+h, x:x+w] for x, y, w, h in
+                                      (boxes[i] for i in pending)])
+            try:
+                predictions = self.recognizer.predict_batch(faces)
+            except Exception:
+                predictions = [(None, None)] * len(pending)
+            for i, (id_, confidence) in zip(pending, predictions):
+                self.tracker.set_identity(tracks[i], id_, confidence, now)
+            predict_time = time.perf_counter() - t0
+
+        predicted = set(pending)
+        identities = []
+        for i, track in enumerate(tracks):
+            if i not in predicted and track.has_identity:
+                self.tracker.use_cached(track)
+            id_, confidence = track.student_id, track.confidence
+            accepted = id_ is not None and confidence < 100 - self.confidence_threshold
+            identities.append((id_ if accepted else None, confidence))
+            results.append((track.track_id, id_ if accepted else None, confidence))
+
+        # Liveness runs on its worker: hand over every recognized face not yet
+        # marked and pick up the verdicts published since the last frame
+        check_liveness = bool(self.liveness_enabled and self.liveness)
+        if check_liveness:
+            t0 = time.perf_counter()
+            self.collect_liveness()
+            candidates = []
+            for track, box, (id_, confidence) in zip(tracks, boxes, identities):
+                if id_ is not None and id_ not in self.recognized_students:
+                    candidates.append((track.track_id, box, id_))
+                    self._liveness_pending[track.track_id] = f"{round(100 - confidence)}%"
+            if candidates:
+                self.liveness_worker.submit(ctx, candidates, self.tracker.tracks)
+            liveness_time = time.perf_counter() - t0
+
+        for track, (x, y, w, h), (id_, confidence) in zip(tracks, boxes, identities):
+            if id_ is not None:
+                name = self.get_student_name(id_)
+                confidence_text = f"{round(100 - confidence)}%"
+
+                liveness_passed = True
+                if id_ not in self.recognized_students:
+                    if check_liveness:
+                        # Marked when the worker publishes a LIVE verdict
+                        liveness_passed = False
+                        info = self.liveness_verdicts.get(track.track_id)
+                        if info is not None:
+                            ctx.add_overlay(draw_liveness_info, (x, y, w, h), info['status'],
+                                            info['confidence'], info['checks'])
+                    else:
+                        self.recognized_students.add(id_)
+                        self.mark_attendance(id_, name, confidence_text)
+
+                color = (0, 255, 0) if liveness_passed else (0, 0, 255)
+                ctx.add_box((x, y, w, h), name, color)
+            else:
+                ctx.add_box((x, y, w, h), "Unknown", (0, 0, 255))
+
+        end = time.perf_counter()
+        self.last_results = results
+        self.last_timings = {
+            'convert': t_detect - start,
+            'detect' if detect else 'track': t_tracked - t_detect,
+            'predict': predict_time,
+            'liveness': liveness_time,
+            'total': end - start
+        }
+        self.scheduler.record(end - start, detect, len(tracks), now)
+        return ctx
+
+    def get_student_name(self, student_id):
+        """Get student name from the shared in-memory student registry"""
+        return self.students.get_name(student_id)
+
+    def mark_attendance(self, student_id, name, confidence, liveness_status="N/A", camera=None):
+        """Save attendance and publish it on attendance_events"""
+        now = datetime.now()
+        event = {
+            'student_id': student_id,
+            'name': name,
+            'time': now.strftime("%H:%M:%S"),
+            'date': now.strftime("%Y-%m-%d"),
+            'confidence': confidence,
+            'liveness_status': liveness_status,
+            'liveness_enabled': bool(LIVENESS_AVAILABLE and self.liveness_enabled),
+            'camera': camera
+        }
+        self.save_attendance(event)
+        self.attendance_events.put(event)
+
+    def save_attendance(self, event):
+        """Queue an attendance row for the background attendance writer"""
+        student_id = event['student_id']
+        filename = os.path.join(self.attendance_dir, f"attendance_{event['date']}.csv")
+
+        # Clean the name - ASCII only to avoid encoding issues
+        clean_name = str(event['name']).encode('ascii', 'ignore').decode('ascii')
+        if not clean_name:
+            clean_name = f"Student_{student_id}"
+
+        fieldnames = ['StudentID', 'Name', 'Time', 'Confidence', 'Date', 'Status']
+        if event['liveness_enabled']:
+            fieldnames.append('LivenessStatus')
+
+        row_data = {
+            'StudentID': str(student_id),
+            'Name': clean_name,
+            'Time': event['time'],
+            'Confidence': event['confidence'],
+            'Date': event['date'],
+            'Status': 'Present'
+        }
+
+        if event['liveness_enabled']:
+            row_data['LivenessStatus'] = event['liveness_status']
+
+        try:
+            self.attendance_writer.write(filename, fieldnames, row_data)
+        except Exception as e:
+            print(f"Error saving attendance: {e}")
+
+    def drain_events(self):
+        """Return every attendance event published since the last call"""
+        events = []
+        while True:
+            try:
+                events.append(self.attendance_events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def format_stats(self):
+        stats = self.tracker.format_stats()
+        if self.liveness_enabled and self.liveness:
+            stats += "\n" + self.liveness.format_stats()
+        return stats
+
+    def close(self):
+        """Stop the worker threads and flush attendance to disk"""
+        if self.liveness_worker is not None:
+            self.liveness_worker.stop()
+        if self.model_watcher is not None:
+            self.model_watcher.stop()
+            self.model_watcher = None
+        self.attendance_writer.close()
+
+
+def run_headless(camera=0, stats_interval=5.0):
+    """Run the engine on a camera, video file or image directory without any UI"""
+    engine = RecognitionEngine()
+    try:
+        engine.load_model()
+        print(f"[{datetime.now():%H:%M:%S}] Model loaded ({engine.recognizer.name})")
+    except Exception as e:
+        print(f"[{datetime.now():%H:%M:%S}] WARNING: Could not load model: {e}")
+    engine.watch_model()
+
+    cap = open_frame_source(camera)
+    if not cap.isOpened():
+        engine.close()
+        raise SystemExit(f"Could not open source {camera}")
+
+    engine.start_session()
+    # No render stage output in headless mode
+    pipeline = VideoPipeline(cap, engine.process_frame, lambda ctx: None,
+                             scheduler=engine.scheduler)
+    pipeline.start()
+    print(f"[{datetime.now():%H:%M:%S}] Recognition running on {cap.name} (Ctrl+C to stop)")
+
+    def print_events():
+        for event in engine.drain_events():
+            print(f"[{event['time']}] PRESENT {event['student_id']} {event['name']} "
+                  f"confidence={event['confidence']} liveness={event['liveness_status']}")
+
+    last_stats = time.monotonic()
+    try:
+        while not pipeline.ended:
+            time.sleep(0.1)
+            print_events()
+            if time.monotonic() - last_stats >= stats_interval:
+                last_stats = time.monotonic()
+                stats = pipeline.format_stats().replace("\n", " || ")
+                print(f"[{datetime.now():%H:%M:%S}] METRICS {stats} || {engine.format_stats()} "
+                      f"|| faces={engine.faces_in_frame} present={len(engine.recognized_students)}")
+        print(f"[{datetime.now():%H:%M:%S}] End of {cap.name}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Stopping waits for the frame in recognition; print what it marked
+        pipeline.stop()
+        print_events()
+        cap.release()
+        engine.close()
+        print(f"[{datetime.now():%H:%M:%S}] Stopped. {len(engine.recognized_students)} students marked present.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Face recognition attendance engine")
+    parser.add_argument("--camera", default=None,
+                        help="camera index, video file or image directory "
+                             "(default: camera_source from settings.json)")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without the Tk window and log to stdout")
+    parser.add_argument("--stats-interval", type=float, default=5.0,
+                        help="seconds between metrics lines in headless mode")
+    args = parser.parse_args(argv)
+
+    if args.headless:
+        camera = args.camera if args.camera is not None else load_settings()["camera_source"]
+        run_headless(camera, args.stats_interval)
+        return
+
+    import tkinter as tk
+    from face_recognition_module import FaceRecognitionModule
+
+    root = tk.Tk()
+    root.withdraw()
+    FaceRecognitionModule(root, camera=args.camera)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
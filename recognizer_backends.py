@@ -0,0 +1,174 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from app_settings import load_settings
+
+LBPH_MODEL_PATH = os.path.join("trainer", "trainer.yml")
+
+
+class LBPHBackend:
+    """
+    OpenCV LBPH recognizer
+
+    `predict` returns (student_id, distance) where a lower distance means a
+    better match; callers accept a match when distance < 100 - threshold.
+    `predict_batch` fans faces out over a thread pool: LBPH prediction is
+    read-only and OpenCV releases the GIL, so faces are scored in parallel.
+    """
+
+    name = "lbph"
+
+    def __init__(self, model_path=LBPH_MODEL_PATH, threads=0):
+        self.model_path = model_path
+        self.recognizer = cv2.face.LBPHFaceRecognizer_create()
+        self.threads = int(threads) or os.cpu_count() or 1
+        self._executor = None
+
+    @property
+    def model_exists(self):
+        return os.path.exists(self.model_path)
+
+    @property
+    def files(self):
+        """Files whose change means the model must be reloaded"""
+        return [self.model_path]
+
+    def load(self):
+        self.recognizer.read(self.model_path)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def predict(self, face):
+        """Predict on one preprocessed grayscale face"""
+        return self.recognizer.predict(face)
+
+    def _predict_safe(self, face):
+        try:
+            return self.recognizer.predict(face)
+        except cv2.error:
+            return None, None
+
+    def predict_batch(self, faces):
+        """
+        Predict on a stack of preprocessed faces
+
+        Returns:
+            list: [(student_id, distance), ...]; (None, None) for faces that failed
+        """
+        if len(faces) < 2 or self.threads < 2:
+            return [self._predict_safe(face) for face in faces]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads,
+                                                thread_name_prefix="lbph")
+        return list(self._executor.map(self._predict_safe, faces))
+
+
+class EmbeddingBackend:
+    """
+    OpenCV DNN face-embedding recognizer with a NumPy centroid gallery
+
+    Each student is represented by the L2-normalized mean embedding of their
+    samples. A query is embedded once and compared against every student with
+    a single matrix-vector product, so cost barely grows with enrollment.
+    The cosine similarity is mapped to the LBPH distance scale
+    ((1 - similarity) * 100) so the confidence threshold works unchanged.
+    """
+
+    name = "embedding"
+
+    def __init__(self, model_path, gallery_path, input_size=96):
+        self.model_path = model_path
+        self.gallery_path = gallery_path
+        self.input_size = int(input_size)
+        self.net = None
+        self.labels = np.empty(0, dtype=np.int64)
+        self.centroids = np.empty((0, 0), dtype=np.float32)
+
+    @property
+    def model_exists(self):
+        return os.path.exists(self.model_path) and os.path.exists(self.gallery_path)
+
+    @property
+    def files(self):
+        return [self.model_path, self.gallery_path]
+
+    def close(self):
+        pass
+
+    def load_network(self):
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"Embedding model not found: {self.model_path}")
+        self.net = cv2.dnn.readNet(self.model_path)
+
+    def load(self):
+        if self.net is None:
+            self.load_network()
+        gallery = np.load(self.gallery_path)
+        self.labels = gallery["labels"].astype(np.int64)
+        self.centroids = gallery["centroids"].astype(np.float32)
+
+    def embed(self, faces):
+        """Return L2-normalized embeddings (N, D) for a list of face crops"""
+        if self.net is None:
+            self.load_network()
+        images = [cv2.cvtColor(f, cv2.COLOR_GRAY2BGR) if f.ndim == 2 else f
+                  for f in faces]
+        blob = cv2.dnn.blobFromImages(images, 1.0 / 255,
+                                      (self.input_size, self.input_size),
+                                      (0, 0, 0), swapRB=True, crop=False)
+        self.net.setInput(blob)
+        embeddings = self.net.forward().reshape(len(images), -1).astype(np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def predict(self, face):
+        """Predict on one preprocessed face"""
+        if len(self.labels) == 0:
+            raise RuntimeError("Embedding gallery is empty")
+        similarities = self.centroids @ self.embed([face])[0]
+        best = int(np.argmax(similarities))
+        return int(self.labels[best]), float((1.0 - similarities[best]) * 100)
+
+    def predict_batch(self, faces):
+        """Embed all faces in one forward pass and score them with one matmul"""
+        if len(faces) == 0:
+            return []
+        if len(self.labels) == 0:
+            raise RuntimeError("Embedding gallery is empty")
+        similarities = self.embed(list(faces)) @ self.centroids.T
+        best = np.argmax(similarities, axis=1)
+        scores = similarities[np.arange(len(best)), best]
+        return [(int(self.labels[b]), float((1.0 - s) * 100)) for b, s in zip(best, scores)]
+
+    def build_gallery(self, faces, ids, batch_size=64):
+        """Embed training faces and save per-student centroids to the gallery file"""
+        ids = np.asarray(ids, dtype=np.int64)
+        chunks = [self.embed(faces[i:i + batch_size])
+                  for i in range(0, len(faces), batch_size)]
+        embeddings = np.vstack(chunks)
+
+        labels = np.unique(ids)
+        centroids = np.stack([embeddings[ids == label].mean(axis=0) for label in labels])
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        os.makedirs(os.path.dirname(self.gallery_path) or ".", exist_ok=True)
+        np.savez(self.gallery_path, labels=labels, centroids=centroids.astype(np.float32))
+        self.labels = labels
+        self.centroids = centroids.astype(np.float32)
+        return len(labels)
+
+
+def create_backend(settings=None):
+    """Create the recognizer backend selected in settings.json"""
+    settings = settings or load_settings()
+    if settings["recognizer_backend"] == EmbeddingBackend.name:
+        return EmbeddingBackend(settings["embedding_model"],
+                                settings["embedding_gallery"],
+                                settings["embedding_input_size"])
+    return LBPHBackend(threads=settings["predict_threads"])
@@ -0,0 +1,64 @@
+import json
+import os
+
+MANIFEST_NAME = "manifest.json"
+
+
+def file_key(path):
+    """(mtime_ns, size) of a sample file, None if it is missing"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class SampleManifest:
+    """
+    Record of how each training sample in the data directory was made
+
+    PhotoCaptureModule saves tight, preprocessed face crops; the manifest
+    marks those files as aligned so training can use them directly instead
+    of running face detection on a crop again. Each entry stores the file's
+    mtime and size when it was recorded: a file replaced or edited since
+    then no longer counts as aligned, and neither does anything not listed
+    (legacy photos, images copied in by hand).
+    """
+
+    def __init__(self, data_dir="data"):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, MANIFEST_NAME)
+        self.samples = {}
+        self.load()
+
+    def load(self):
+        self.samples = {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self.samples = json.load(f).get("samples", {})
+        except (OSError, ValueError) as e:
+            print(f"Error reading sample manifest: {e}")
+
+    def save(self):
+        """Write the manifest atomically"""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({"version": 1, "samples": self.samples}, f, indent=1)
+        os.replace(temp_path, self.path)
+
+    def add(self, filename, student_id, aligned=True):
+        """Record a sample file that has just been written"""
+        self.samples[filename] = {
+            "student_id": int(student_id),
+            "aligned": bool(aligned),
+            "file": file_key(os.path.join(self.data_dir, filename))
+        }
+
+    def is_aligned(self, filename):
+        """True if `filename` is an unchanged, pre-aligned face crop"""
+        entry = self.samples.get(filename)
+        if not entry or not entry.get("aligned"):
+            return False
+        return entry.get("file") == file_key(os.path.join(self.data_dir, filename))
@@ -1,35 +1,63 @@
 import customtkinter as ctk
-import json
-import os
+from tkinter import messagebox
+
+from app_settings import SETTINGS_PATH, load_settings, update_settings
+
+# Keys this window edits; only these are written to settings.json
+EDITABLE_KEYS = ("appearance", "auto_refresh", "refresh_interval", "recognizer_backend",
+                 "detection_scale", "min_face_size", "max_face_size")
 
 class SettingsWindow:
     def __init__(self, root):
         self.root = root
-        self.config_path = "settings.json"
+        self.config_path = SETTINGS_PATH
 
         self.win = ctk.CTkToplevel(root)
         self.win.title("⚙️ System Settings")
-        self.win.geometry("650x550")
+        self.win.geometry("650x700")
         self.win.grab_set()
 
         self.load_settings()
         self.build_ui()
 
     def load_settings(self):
-        if os.path.exists(self.config_path):
-            with open(self.config_path, "r") as f:
-                self.settings = json.load(f)
-        else:
-            self.settings = {
-                "appearance": "dark",
-                "auto_refresh": True,
-                "refresh_interval": 10,
-                "enable_voice": True
-            }
+        self.settings = load_settings(self.config_path)
 
     def save_settings(self):
-        with open(self.config_path, "w") as f:
-            json.dump(self.settings, f, indent=4)
+        try:
+            refresh_interval = int(self.interval_entry.get())
+            scale = float(self.scale_entry.get())
+            min_size = int(self.min_face_entry.get())
+            max_size = int(self.max_face_entry.get())
+        except ValueError:
+            messagebox.showerror("Invalid Settings",
+                                 "Refresh interval and face sizes must be whole numbers, "
+                                 "detection scale a number.", parent=self.win)
+            return
+        if refresh_interval <= 0:
+            messagebox.showerror("Invalid Settings", "Refresh interval must be above 0.",
+                                 parent=self.win)
+            return
+        if not 0.25 <= scale <= 1:
+            messagebox.showerror("Invalid Settings", "Detection scale must be between 0.25 and 1.0.",
+                                 parent=self.win)
+            return
+        if min_size < 0 or max_size < 0 or (max_size and max_size < min_size):
+            messagebox.showerror("Invalid Settings",
+                                 "Face sizes cannot be negative, and the max size must be "
+                                 "0 or at least the min size.", parent=self.win)
+            return
+
+        self.settings["refresh_interval"] = refresh_interval
+        self.settings["detection_scale"] = scale
+        self.settings["min_face_size"] = min_size
+        self.settings["max_face_size"] = max_size
+        try:
+            update_settings({key: self.settings[key] for key in EDITABLE_KEYS}, self.config_path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save settings: {e}", parent=self.win)
+            return
+        messagebox.showinfo("Settings", "Settings saved.", parent=self.win)
 
     def build_ui(self):
         title = ctk.CTkLabel(self.win, text="⚙️ SYSTEM SETTINGS",
@@ -67,6 +95,35 @@ class SettingsWindow:
         self.interval_entry.insert(0, str(self.settings["refresh_interval"]))
         self.interval_entry.pack(fill="x", pady=5)
 
+        # Recognizer backend
+        ctk.CTkLabel(container, text="Recognizer Backend:",
+                     font=ctk.CTkFont(size=14)).pack(anchor="w", pady=5)
+        self.backend_box = ctk.CTkOptionMenu(
+            container,
+            values=["lbph", "embedding"],
+            command=self.update_backend
+        )
+        self.backend_box.set(self.settings["recognizer_backend"])
+        self.backend_box.pack(fill="x", pady=5)
+
+        # Face detection
+        ctk.CTkLabel(container, text="Detection Scale (0.25 - 1.0):",
+                     font=ctk.CTkFont(size=14)).pack(anchor="w")
+        self.scale_entry = ctk.CTkEntry(container)
+        self.scale_entry.insert(0, str(self.settings["detection_scale"]))
+        self.scale_entry.pack(fill="x", pady=5)
+
+        ctk.CTkLabel(container, text="Min / Max Face Size (pixels, 0 = no limit):",
+                     font=ctk.CTkFont(size=14)).pack(anchor="w")
+        size_row = ctk.CTkFrame(container, fg_color="transparent")
+        size_row.pack(fill="x", pady=5)
+        self.min_face_entry = ctk.CTkEntry(size_row)
+        self.min_face_entry.insert(0, str(self.settings["min_face_size"]))
+        self.min_face_entry.pack(side="left", fill="x", expand=True, padx=(0, 5))
+        self.max_face_entry = ctk.CTkEntry(size_row)
+        self.max_face_entry.insert(0, str(self.settings["max_face_size"]))
+        self.max_face_entry.pack(side="left", fill="x", expand=True, padx=(5, 0))
+
         # Save button
         ctk.CTkButton(container, text="Save Settings",
                       fg_color="#2ecc71",
@@ -76,5 +133,8 @@ class SettingsWindow:
         self.settings["appearance"] = mode
         ctk.set_appearance_mode(mode)
 
+    def update_backend(self, backend):
+        self.settings["recognizer_backend"] = backend
+
     def toggle_refresh(self):
         self.settings["auto_refresh"] = self.refresh_switch.get() == 1
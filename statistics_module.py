@@ -3,6 +3,8 @@ import csv
 from datetime import datetime, timedelta
 import glob
 
+from student_registry import StudentRegistry
+
 class RealTimeStatistics:
     """
     Enhanced Real-time Statistics with comprehensive data tracking
@@ -12,21 +14,9 @@ class RealTimeStatistics:
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
     
     def get_total_students(self):
-        """Count total students from students.csv"""
+        """Count total students from the shared student registry"""
         students_file = os.path.join(self.base_dir, 'student_data', 'students.csv')
-        
-        if not os.path.exists(students_file):
-            return 0
-        
-        try:
-            with open(students_file, 'r', encoding='utf-8', newline='') as f:
-                reader = csv.reader(f)
-                next(reader, None)  # Skip header
-                count = sum(1 for row in reader if any(cell.strip() for cell in row))
-                return count
-        except Exception as e:
-            print(f"Error reading students: {e}")
-            return 0
+        return StudentRegistry.shared(students_file).count()
     
     def get_present_today(self):
         """Count unique students marked present today"""
@@ -260,26 +250,7 @@ class RealTimeStatistics:
     def get_student_names_map(self):
         """Create a mapping of student IDs to names"""
         students_file = os.path.join(self.base_dir, 'student_data', 'students.csv')
-        
-        if not os.path.exists(students_file):
-            return {}
-        
-        try:
-            name_map = {}
-            with open(students_file, 'r', encoding='utf-8', newline='') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    student_id = row.get('StudentID', '').strip()
-                    name = row.get('Name', '').strip()
-                    if student_id and name:
-                        # Clean name
-                        clean_name = name.encode('ascii', 'ignore').decode('ascii')
-                        if clean_name:
-                            name_map[student_id] = clean_name
-            return name_map
-        except Exception as e:
-            print(f"Error reading student names: {e}")
-            return {}
+        return StudentRegistry.shared(students_file).names_map()
     
     def get_all_statistics(self):
         """Get all statistics at once for efficient updates"""
@@ -5,6 +5,8 @@ from datetime import datetime
 import csv
 import os
 
+from student_registry import StudentRegistry
+
 class UpdatedStudentManagement:
     def __init__(self, parent):
         self.parent = parent
@@ -349,19 +351,20 @@ class UpdatedStudentManagement:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save: {str(e)}")
     
+    def same_id(self, stored_id, student_id):
+        """Compare IDs the way the registry does (07 and 7 are the same student)"""
+        try:
+            return int(stored_id) == int(student_id)
+        except (TypeError, ValueError):
+            return str(stored_id).strip() == str(student_id).strip()
+    
     def student_exists(self, student_id):
-        csv_file = 'student_data/students.csv'
-        if not os.path.isfile(csv_file):
-            return False
+        registry = StudentRegistry.shared()
+        registry.refresh(force=True)
         try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row.get('StudentID') == student_id:
-                        return True
-        except:
-            pass
-        return False
+            return registry.exists(int(student_id))
+        except ValueError:
+            return False
     
     def update_student(self):
         """Update existing student"""
@@ -400,7 +403,9 @@ class UpdatedStudentManagement:
                 students = list(reader)
             
             for i, student in enumerate(students):
-                if student['StudentID'] == student_id:
+                if self.same_id(student['StudentID'], student_id):
+                    # Keep the ID as it was stored
+                    student_data['StudentID'] = student['StudentID']
                     students[i] = student_data
                     break
             
@@ -437,7 +442,8 @@ class UpdatedStudentManagement:
             with open(csv_file, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
                 fieldnames = reader.fieldnames
-                students = [row for row in reader if row['StudentID'] != student_id]
+                students = [row for row in reader
+                            if not self.same_id(row['StudentID'], student_id)]
             
             with open(temp_file, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
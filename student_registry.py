@@ -0,0 +1,106 @@
+import csv
+import os
+import threading
+import time
+
+STUDENTS_CSV = os.path.join('student_data', 'students.csv')
+
+
+def clean_name(name, student_id):
+    """ASCII-only display name, falling back to Student_<id>"""
+    name = str(name or '').strip().encode('ascii', 'ignore').decode('ascii')
+    return name if name else f"Student_{student_id}"
+
+
+class StudentRegistry:
+    """
+    In-memory view of students.csv keyed by integer student ID
+
+    The CSV is parsed once and only re-read when its mtime or size changes.
+    The file is stat()ed at most once per `check_interval` seconds, so
+    lookups from the recognition loop are plain dict reads. Use
+    `StudentRegistry.shared()` to get the process-wide instance for a path.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path=STUDENTS_CSV, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = None
+        self._last_check = 0.0
+        self._students = {}
+
+    @classmethod
+    def shared(cls, path=STUDENTS_CSV):
+        """Return the shared registry for `path` (one per absolute path)"""
+        key = os.path.abspath(path)
+        with cls._instances_lock:
+            registry = cls._instances.get(key)
+            if registry is None:
+                registry = cls(key)
+                cls._instances[key] = registry
+            return registry
+
+    def refresh(self, force=False):
+        """Reload the CSV if it changed; `force` skips the check_interval throttle"""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+
+            try:
+                stat = os.stat(self.path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                self._signature = None
+                self._students = {}
+                return
+
+            if signature == self._signature:
+                return
+
+            students = {}
+            try:
+                with open(self.path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+                    for row in csv.DictReader(f):
+                        try:
+                            students[int(row['StudentID'])] = row
+                        except (ValueError, KeyError, TypeError):
+                            continue
+            except Exception as e:
+                print(f"Error reading students: {e}")
+                return
+
+            self._students = students
+            self._signature = signature
+
+    def get(self, student_id):
+        """Return the CSV row for a student, or None"""
+        self.refresh()
+        return self._students.get(student_id)
+
+    def get_name(self, student_id):
+        row = self.get(student_id)
+        return clean_name(row.get('Name') if row else '', student_id)
+
+    def exists(self, student_id):
+        self.refresh()
+        return student_id in self._students
+
+    def count(self):
+        self.refresh()
+        return len(self._students)
+
+    def names_map(self):
+        """{str(student_id): clean name} for every student with a usable name"""
+        self.refresh()
+        name_map = {}
+        for student_id, row in self._students.items():
+            name = str(row.get('Name') or '').strip().encode('ascii', 'ignore').decode('ascii')
+            if name:
+                name_map[str(student_id)] = name
+        return name_map
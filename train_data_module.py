@@ -1,11 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import cv2
-from PIL import Image, ImageTk
-import numpy as np
 import os
+import queue
 from datetime import datetime
 
+from face_training import TrainingJob
+from model_registry import ModelRegistry
+
 class TrainDataModule:
     def __init__(self, parent):
         self.parent = parent
@@ -133,6 +134,19 @@ Note: Collect photo samples before training (50-100 photos per student recommend
                                   state='disabled')
         self.train_btn.pack(side='left', padx=10)
         
+        # Update the existing model with new samples instead of retraining
+        self.incremental_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(button_frame, text="New samples only (incremental)",
+                      variable=self.incremental_var, bg='#0a0a2e', fg='white',
+                      selectcolor='#2c3e50', font=('Arial', 10)).pack(side='left', padx=10)
+        
+        self.rollback_btn = tk.Button(button_frame, text="⏪ ROLLBACK MODEL",
+                                     bg='#8e44ad', fg='white',
+                                     font=('Arial', 11, 'bold'),
+                                     width=18, height=2,
+                                     command=self.rollback_model)
+        self.rollback_btn.pack(side='left', padx=10)
+        
         tk.Button(button_frame, text="🚪 CLOSE",
                  bg='#e74c3c', fg='white',
                  font=('Arial', 11, 'bold'),
@@ -187,87 +201,100 @@ Note: Collect photo samples before training (50-100 photos per student recommend
         self.is_training = True
         self.train_btn.config(state='disabled')
         self.scan_btn.config(state='disabled')
+        self.rollback_btn.config(state='disabled')
         self.status_label.config(text="Status: Training...", fg='#f39c12')
+        self.progress_bar['value'] = 0
+        self.progress_label.config(text="0%")
         
         self.log("="*50)
         self.log("STARTING TRAINING PROCESS")
         self.log("="*50)
         
-        try:
-            # Initialize face detector
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            
-            # Prepare data
-            faces = []
-            ids = []
-            
-            data_dir = "data"
-            image_files = [f for f in os.listdir(data_dir) if f.endswith(('.jpg', '.jpeg', '.png'))]
-            self.total_faces = len(image_files)
-            self.processed_faces = 0
-            
-            self.log(f"Processing {self.total_faces} images...")
+        # Decode, detection and training run off the Tk thread
+        self.job = TrainingJob(incremental=self.incremental_var.get())
+        self.job.start()
+        self.window.after(100, self.poll_training)
+    
+    def poll_training(self):
+        """Apply progress events posted by the training job"""
+        if not self.window.winfo_exists():
+            return
+        
+        while True:
+            try:
+                event = self.job.events.get_nowait()
+            except queue.Empty:
+                break
             
-            for filename in image_files:
-                img_path = os.path.join(data_dir, filename)
-                
-                # Extract student ID from filename
-                parts = filename.split('.')
-                if len(parts) >= 2:
-                    student_id = int(parts[1])
-                    
-                    # Load image
-                    img = Image.open(img_path).convert('L')  # Convert to grayscale
-                    img_np = np.array(img, 'uint8')
-                    
-                    # Detect faces
-                    detected_faces = face_cascade.detectMultiScale(img_np)
-                    
-                    for (x, y, w, h) in detected_faces:
-                        faces.append(img_np[y:y+h, x:x+w])
-                        ids.append(student_id)
-                
-                self.processed_faces += 1
-                progress = (self.processed_faces / self.total_faces) * 100
+            kind = event[0]
+            if kind == 'log':
+                self.log(event[1])
+            elif kind == 'progress':
+                done, total = event[1], event[2]
+                progress = (done / total) * 100 if total else 100
                 self.progress_bar['value'] = progress
                 self.progress_label.config(text=f"{int(progress)}%")
-                self.window.update()
-            
-            self.faces_label.config(text=f"Faces Detected: {len(faces)}")
-            self.log(f"Detected {len(faces)} faces from {self.total_faces} images")
-            
-            if len(faces) == 0:
-                raise Exception("No faces detected in the images!")
-            
-            # Train the recognizer
-            self.log("Training LBPH Face Recognizer...")
-            recognizer = cv2.face.LBPHFaceRecognizer_create()
-            recognizer.train(faces, np.array(ids))
-            
-            # Save the model
-            trainer_dir = "trainer"
-            os.makedirs(trainer_dir, exist_ok=True)
-            model_path = os.path.join(trainer_dir, "trainer.yml")
-            recognizer.write(model_path)
-            
-            self.log(f"Model saved to: {model_path}")
-            self.log("="*50)
-            self.log("TRAINING COMPLETED SUCCESSFULLY!")
-            self.log("="*50)
-            
-            self.status_label.config(text="Status: Completed", fg='#2ecc71')
-            messagebox.showinfo("Success", 
-                f"Training completed successfully!\n\nFaces trained: {len(faces)}\nModel saved to: {model_path}")
-            
-        except Exception as e:
-            self.log(f"ERROR: {str(e)}")
-            self.status_label.config(text="Status: Failed", fg='#e74c3c')
-            messagebox.showerror("Error", f"Training failed: {str(e)}")
-        
-        finally:
-            self.is_training = False
-            self.scan_btn.config(state='normal')
-            self.train_btn.config(state='normal')
+            elif kind == 'faces':
+                self.faces_label.config(text=f"Faces Detected: {event[1]}")
+            elif kind == 'done':
+                self.training_finished(event[1])
+                return
+            elif kind == 'error':
+                self.training_failed(event[1])
+                return
+        
+        self.window.after(100, self.poll_training)
+    
+    def training_finished(self, result):
+        mode = "Incremental update" if result['incremental'] else "Full training"
+        self.log(f"{mode} took {result['seconds']:.1f}s")
+        self.log("="*50)
+        self.log("TRAINING COMPLETED SUCCESSFULLY!")
+        self.log("="*50)
+        
+        self.status_label.config(text="Status: Completed", fg='#2ecc71')
+        self.end_training()
+        messagebox.showinfo("Success", 
+            f"Training completed successfully!\n\nFaces trained: {result['faces']}\n"
+            f"Model version: {result['version']}\nModel saved to: {result['model_path']}")
+    
+    def training_failed(self, error):
+        self.log(f"ERROR: {error}")
+        self.status_label.config(text="Status: Failed", fg='#e74c3c')
+        self.end_training()
+        messagebox.showerror("Error", f"Training failed: {error}")
+    
+    def end_training(self):
+        self.is_training = False
+        self.scan_btn.config(state='normal')
+        self.train_btn.config(state='normal')
+        self.rollback_btn.config(state='normal')
+    
+    def rollback_model(self):
+        """Make the previous model version live again"""
+        registry = ModelRegistry()
+        current = registry.current_version()
+        older = [v for v in registry.versions() if current is None or v < current]
+        if not older:
+            messagebox.showinfo("Rollback", "No older model version to roll back to.")
+            return
+        
+        version = older[-1]
+        metadata = registry.metadata(version)
+        if not messagebox.askyesno("Rollback",
+                f"Replace model version {current} with version {version}?\n\n"
+                f"Trained: {metadata.get('created', '?')}\n"
+                f"Faces: {metadata.get('face_count', '?')}"):
+            return
+        
+        try:
+            registry.rollback(version)
+        except (OSError, ValueError) as e:
+            self.log(f"ERROR: {e}")
+            messagebox.showerror("Error", f"Rollback failed: {e}")
+            return
+        self.log(f"Rolled back to model version {version}")
+        self.status_label.config(text=f"Status: Model v{version}", fg='#2ecc71')
 
 if __name__ == "__main__":
     root = tk.Tk()
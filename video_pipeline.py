@@ -0,0 +1,344 @@
+import math
+import threading
+import time
+from collections import deque
+
+
+class StageStats:
+    """
+    Rolling FPS and latency counters for one pipeline stage
+
+    Every processed item is recorded with how long the stage spent on it.
+    FPS is computed over the last `window` items, latency is the mean of
+    the same window. Dropped items (overwritten in a full queue) are counted
+    separately so the UI can show when a stage cannot keep up.
+    """
+
+    def __init__(self, name, window=30):
+        self.name = name
+        self._lock = threading.Lock()
+        self._stamps = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self.processed = 0
+        self.dropped = 0
+
+    def record(self, latency):
+        """Record one processed item and the seconds it took"""
+        with self._lock:
+            self._stamps.append(time.perf_counter())
+            self._latencies.append(latency)
+            self.processed += 1
+
+    def record_drop(self):
+        """Record one item discarded before this stage could consume it"""
+        with self._lock:
+            self.dropped += 1
+
+    def reset(self):
+        """Clear all counters"""
+        with self._lock:
+            self._stamps.clear()
+            self._latencies.clear()
+            self.processed = 0
+            self.dropped = 0
+
+    def snapshot(self):
+        """Return current counters as a dict (fps, latency_ms, processed, dropped)"""
+        with self._lock:
+            fps = 0.0
+            if len(self._stamps) >= 2:
+                elapsed = self._stamps[-1] - self._stamps[0]
+                if elapsed > 0:
+                    fps = (len(self._stamps) - 1) / elapsed
+            latency = 0.0
+            if self._latencies:
+                latency = sum(self._latencies) / len(self._latencies)
+            return {
+                'fps': fps,
+                'latency_ms': latency * 1000,
+                'processed': self.processed,
+                'dropped': self.dropped
+            }
+
+
+class DropOldestQueue:
+    """
+    Bounded thread-safe queue that discards the oldest item when full
+
+    Producers never block: a slow consumer only ever sees the most recent
+    `maxsize` items. Drops are reported to the optional StageStats of the
+    consuming stage.
+    """
+
+    def __init__(self, maxsize=1, stats=None):
+        self.maxsize = max(1, maxsize)
+        self.stats = stats
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            while len(self._items) >= self.maxsize:
+                self._items.popleft()
+                if self.stats is not None:
+                    self.stats.record_drop()
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Pop the oldest item, waiting up to `timeout` seconds; None if empty"""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def get_nowait(self):
+        return self.get(timeout=0)
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class CaptureThread(threading.Thread):
+    """
+    Reads frames from a capture source and keeps only the newest one
+
+    A failed read is retried, except on a file or directory source that
+    reports `ended`: the thread then sets its own `ended` event and exits.
+    """
+
+    def __init__(self, cap, output, stats, stop_event):
+        super().__init__(name="capture", daemon=True)
+        self.cap = cap
+        self.output = output
+        self.stats = stats
+        self.stop_event = stop_event
+        self.ended = threading.Event()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                if getattr(self.cap, 'ended', False):
+                    self.ended.set()
+                    return
+                time.sleep(0.01)
+                continue
+            self.stats.record(time.perf_counter() - start)
+            self.output.put(frame)
+
+
+class AdaptiveScheduler:
+    """
+    Decides how often the recognition stage runs full face detection
+
+    Detection frames and tracking-only frames are timed separately (EMA).
+    The detection interval N is the smallest value whose average per-frame
+    cost, (detect + (N - 1) * track) / N, fits in the 1 / target_fps budget.
+    When no face has been seen for `idle_after` seconds the stage drops to
+    `idle_fps` and detects on every frame it processes.
+    """
+
+    def __init__(self, target_fps=15, max_detect_interval=10, idle_after=5.0,
+                 idle_fps=3, smoothing=0.2):
+        self.target_fps = float(target_fps)
+        self.max_detect_interval = max(1, int(max_detect_interval))
+        self.idle_after = float(idle_after)
+        self.idle_fps = float(idle_fps)
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self):
+        self.detect_interval = 1
+        self.detect_cost = None
+        self.track_cost = None
+        self.last_cost = 0.0
+        self._frames_since_detect = 0
+        # Set by the first record(), so the idle clock follows the caller's clock
+        self._last_face_time = None
+        self._last_time = None
+
+    @property
+    def idle(self):
+        return self.is_idle()
+
+    def is_idle(self, now=None):
+        """True if no face has been seen for idle_after seconds (`now` defaults to the last record)"""
+        now = self._last_time if now is None else now
+        if self._last_face_time is None or now is None:
+            return False
+        return now - self._last_face_time > self.idle_after
+
+    def should_detect(self, has_tracks=True, now=None):
+        """True if this frame needs full detection (vs. tracker update only)"""
+        if not has_tracks or self.is_idle(now):
+            return True
+        return self._frames_since_detect + 1 >= self.detect_interval
+
+    def _smooth(self, previous, value):
+        if previous is None:
+            return value
+        return previous + self.smoothing * (value - previous)
+
+    def record(self, cost, detected, faces, now=None):
+        """Record one processed frame and retune the detection interval"""
+        now = time.monotonic() if now is None else now
+        self.last_cost = cost
+        self._last_time = now
+        if faces or self._last_face_time is None:
+            self._last_face_time = now
+
+        if detected:
+            self._frames_since_detect = 0
+            self.detect_cost = self._smooth(self.detect_cost, cost)
+        else:
+            self._frames_since_detect += 1
+            self.track_cost = self._smooth(self.track_cost, cost)
+
+        budget = 1.0 / self.target_fps
+        detect_cost = self.detect_cost or 0.0
+        track_cost = self.track_cost if self.track_cost is not None else detect_cost * 0.1
+        if detect_cost <= budget:
+            interval = 1
+        elif track_cost >= budget:
+            interval = self.max_detect_interval
+        else:
+            interval = math.ceil((detect_cost - track_cost) / (budget - track_cost))
+        self.detect_interval = min(self.max_detect_interval, max(1, interval))
+
+    def frame_delay(self):
+        """Seconds the recognition stage should wait before the next frame"""
+        fps = self.idle_fps if self.idle else self.target_fps
+        return max(0.0, 1.0 / fps - self.last_cost)
+
+    def format_stats(self):
+        mode = "idle" if self.idle else "active"
+        return f"Detect every {self.detect_interval} | target {self.target_fps:.0f} FPS | {mode}"
+
+
+class StageThread(threading.Thread):
+    """Applies `func` to every item of `input_queue` and forwards the result"""
+
+    def __init__(self, name, func, input_queue, output, stats, stop_event,
+                 delay_func=None):
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.input_queue = input_queue
+        self.output = output
+        self.stats = stats
+        self.stop_event = stop_event
+        self.delay_func = delay_func
+
+    def run(self):
+        while not self.stop_event.is_set():
+            item = self.input_queue.get(timeout=0.1)
+            if item is None:
+                continue
+            start = time.perf_counter()
+            try:
+                result = self.func(item)
+            except Exception as e:
+                print(f"Error in {self.name} stage: {e}")
+                continue
+            self.stats.record(time.perf_counter() - start)
+            if result is not None:
+                self.output.put(result)
+            if self.delay_func is not None:
+                delay = self.delay_func()
+                if delay > 0:
+                    self.stop_event.wait(delay)
+
+
+class VideoPipeline:
+    """
+    Staged capture -> recognition -> render pipeline
+
+    Each stage runs on its own thread and hands work to the next through a
+    DropOldestQueue, so a slow stage only causes frames to be skipped instead
+    of stalling the stages before it. The Tk loop never does heavy work: it
+    only calls `poll()` to pick up the latest rendered image.
+
+    Args:
+        cap: Object with a cv2.VideoCapture-like `read()` method
+        process_func: frame -> annotated frame (recognition stage)
+        render_func: annotated frame -> display image (render stage)
+        queue_size: Capacity of the queues between recognition/render/UI
+        scheduler: Optional AdaptiveScheduler pacing the recognition stage
+    """
+
+    STAGES = ('capture', 'recognition', 'render')
+
+    def __init__(self, cap, process_func, render_func, queue_size=2,
+                 scheduler=None):
+        self.cap = cap
+        self.scheduler = scheduler
+        self.stats = {name: StageStats(name) for name in self.STAGES}
+
+        # Capture keeps only the newest frame; recognition drops stale ones
+        self.frames = DropOldestQueue(1, self.stats['recognition'])
+        self.results = DropOldestQueue(queue_size, self.stats['render'])
+        self.rendered = DropOldestQueue(queue_size)
+
+        self._stop_event = threading.Event()
+        self._threads = [
+            CaptureThread(cap, self.frames, self.stats['capture'], self._stop_event),
+            StageThread("recognition", process_func, self.frames, self.results,
+                        self.stats['recognition'], self._stop_event,
+                        scheduler.frame_delay if scheduler else None),
+            StageThread("render", render_func, self.results, self.rendered,
+                        self.stats['render'], self._stop_event)
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop all stages and wait for their threads to exit"""
+        self._stop_event.set()
+        for thread in self._threads:
+            if thread.is_alive():
+                thread.join(timeout)
+        self.frames.clear()
+        self.results.clear()
+        self.rendered.clear()
+
+    @property
+    def is_running(self):
+        return not self._stop_event.is_set()
+
+    @property
+    def ended(self):
+        """True once a file or directory source is exhausted and its last frame was taken"""
+        return self._threads[0].ended.is_set() and len(self.frames) == 0
+
+    def poll(self):
+        """Return the newest rendered item, or None if nothing new is ready"""
+        latest = None
+        item = self.rendered.get_nowait()
+        while item is not None:
+            latest = item
+            item = self.rendered.get_nowait()
+        return latest
+
+    def get_stats(self):
+        """Return {stage: snapshot} for every stage"""
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+    def format_stats(self):
+        """Human readable one line per stage summary for the control panel"""
+        lines = []
+        for name, snap in self.get_stats().items():
+            lines.append(f"{name.capitalize()}: {snap['fps']:.1f} FPS | "
+                         f"{snap['latency_ms']:.1f} ms | drop {snap['dropped']}")
+        if self.scheduler is not None:
+            lines.append(self.scheduler.format_stats())
+        return "\n".join(lines)